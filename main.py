@@ -1,5 +1,4 @@
 import hydra
-import polars as pl
 from hydra.core.hydra_config import HydraConfig
 from omegaconf import DictConfig
 from tqdm import tqdm
@@ -13,7 +12,8 @@ def main(cfg: DictConfig) -> None:
 
     typhoon_data_path = cfg.env.typhoon_data_path
 
-    output_folder_path = HydraConfig.get().run.dir
+    # --multirunでも各ジョブの出力先を指すようにruntime.output_dirを使う
+    output_folder_path = HydraConfig.get().runtime.output_dir
 
     tpg_ship_log_file_name = cfg.output_env.tpg_ship_log_file_name
     storage_base_log_file_name = cfg.output_env.storage_base_log_file_name
@@ -25,65 +25,27 @@ def main(cfg: DictConfig) -> None:
 
     progress_bar = tqdm(total=6, desc=output_folder_path)
 
+    # 各モデルの引数名は設定ファイルのキー名と一致させている
     # TPG ship
-    initial_position = cfg.tpg_ship.initial_position
-    hull_num = cfg.tpg_ship.hull_num
-    storage_method = cfg.tpg_ship.storage_method
-    max_storage_wh = cfg.tpg_ship.max_storage_wh
-    generator_output_w = cfg.tpg_ship.generator_output_w
-    ship_return_speed_kt = cfg.tpg_ship.ship_return_speed_kt
-    ship_max_speed_kt = cfg.tpg_ship.ship_max_speed_kt
-    forecast_weight = cfg.tpg_ship.forecast_weight
-    typhoon_effective_range = cfg.tpg_ship.typhoon_effective_range
-    govia_base_judge_energy_storage_per = (
-        cfg.tpg_ship.govia_base_judge_energy_storage_per
-    )
-    judge_time_times = cfg.tpg_ship.judge_time_times
-    tpg_ship_1 = tpg_ship.TPG_ship(
-        initial_position,
-        hull_num,
-        storage_method,
-        max_storage_wh,
-        generator_output_w,
-        ship_return_speed_kt,
-        ship_max_speed_kt,
-        forecast_weight,
-        typhoon_effective_range,
-        govia_base_judge_energy_storage_per,
-        judge_time_times,
-    )
+    tpg_ship_1 = tpg_ship.TPG_ship(**dict(cfg.tpg_ship))
 
     # Forecaster
-    forecast_time = cfg.forecaster.forecast_time
-    forecast_error_slope = cfg.forecaster.forecast_error_slope
-    typhoon_path_forecaster = forecaster.Forecaster(forecast_time, forecast_error_slope)
+    typhoon_path_forecaster = forecaster.Forecaster(**dict(cfg.forecaster))
 
     # Storage base
-    base_locate = cfg.storage_base.locate
-    st_base_max_storage_wh = cfg.storage_base.max_storage_wh
-    st_base = storage_base.Storage_base(base_locate, st_base_max_storage_wh)
+    # supportSHIPを呼ぶ閾値はsupport_ship_1の蓄電容量を基準にする
+    st_base = storage_base.Storage_base(
+        support_ship_max_storage_wh=cfg.support_ship_1.max_storage_wh,
+        **dict(cfg.storage_base),
+    )
 
     # Support ship 1
-    support_ship_1_supply_base_locate = cfg.support_ship_1.supply_base_locate
-    support_ship_1_max_storage_wh = cfg.support_ship_1.max_storage_wh
-    support_ship_1_max_speed_kt = cfg.support_ship_1.ship_speed_kt
-    support_ship_1 = support_ship.Support_ship(
-        support_ship_1_supply_base_locate,
-        support_ship_1_max_storage_wh,
-        support_ship_1_max_speed_kt,
-    )
+    support_ship_1 = support_ship.Support_ship(**dict(cfg.support_ship_1))
 
     # Support ship 2
-    support_ship_2_supply_base_locate = cfg.support_ship_2.supply_base_locate
-    support_ship_2_max_storage_wh = cfg.support_ship_2.max_storage_wh
-    support_ship_2_max_speed_kt = cfg.support_ship_2.ship_speed_kt
-    support_ship_2 = support_ship.Support_ship(
-        support_ship_2_supply_base_locate,
-        support_ship_2_max_storage_wh,
-        support_ship_2_max_speed_kt,
-    )
+    support_ship_2 = support_ship.Support_ship(**dict(cfg.support_ship_2))
 
-    simulator.simulate(
+    sim_data_length = simulator.simulate(
         tpg_ship_1,  # TPG ship
         typhoon_path_forecaster,  # Forecaster
         st_base,  # Storage base
@@ -115,11 +77,6 @@ def main(cfg: DictConfig) -> None:
     )
     progress_bar.update(1)
 
-    # TODO : Just for getting the length of simulation data.
-    sim_data_length = len(
-        pl.read_csv(output_folder_path + "/" + tpg_ship_log_file_name)
-    )
-
     utils.merge_map_graph(
         sim_data_length,
         output_folder_path + "/" + png_map_folder_name,
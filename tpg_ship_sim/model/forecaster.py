@@ -2,10 +2,44 @@
 # 予想したデータを受け渡す役割を持つのでForecasterとした
 # 現状は真のデータから期間分のデータを取り出すこと以外の能力はない
 
-import random
+import functools
 
+import numpy as np
 import polars as pl
-from geopy.distance import geodesic
+
+# 緯度-90度〜90度の1度刻みのcos(緯度)の表
+_COS_LAT_TABLE = np.cos(np.radians(np.arange(-90, 91)))
+
+
+@functools.lru_cache(maxsize=4)
+def load_typhoon_data(typhoon_data_path):
+    """
+    ############################## def load_typhoon_data ##############################
+
+    [ 説明 ]
+
+    台風の経路データを読み込む関数です。
+
+    予報の作成や描画に必要な列(unixtime, TYPHOON NUMBER, LAT, LON)のみを読み込みます。
+
+    同じファイルを何度も読み込まないように、読み込んだデータはキャッシュされます。
+
+    ##############################################################################
+
+    引数 :
+        typhoon_data_path (str) : 台風の経路データのファイルパス
+
+    戻り値 :
+        typhoon_data (dataflame) : 台風の経路データ
+
+    #############################################################################
+    """
+
+    typhoon_data = pl.read_csv(
+        typhoon_data_path, columns=["unixtime", "TYPHOON NUMBER", "LAT", "LON"]
+    )
+
+    return typhoon_data
 
 
 class Forecaster:
@@ -29,6 +63,7 @@ class Forecaster:
         slope (float) : 予報の誤差距離を設定する。時間を変数とする1次関数の傾きであり遠い時間
                         ほど誤差が大きくなる。
         original_data (dataflame) : 過去の台風の座標とそれに対応する時刻を保有するデータ
+        rng (Generator) : 予報座標のばらつきを生成する乱数生成器。seedを指定すると予報を再現できる。
 
     #############################################################################
     """
@@ -36,9 +71,21 @@ class Forecaster:
     forecast_time = 0
     slope = 0
 
-    def __init__(self, forecast_time, forecast_error_slope) -> None:
+    def __init__(self, forecast_time, forecast_error_slope, seed=None) -> None:
         self.forecast_time = forecast_time
         self.slope = forecast_error_slope
+        # 予報座標のばらつきを生成する乱数生成器
+        self.rng = np.random.default_rng(seed)
+
+    @property
+    def original_data(self):
+        return self._original_data
+
+    @original_data.setter
+    def original_data(self, original_data):
+        # 予報期間のデータを二分探索で切り出せるように時刻順に並べ替えておく
+        self._original_data = original_data.sort("unixtime")
+        self._unixtime_arr = self._original_data["unixtime"].to_numpy()
 
     def cal_error_radius_km(self, time_step, advance_time_hour):
         """
@@ -83,46 +130,27 @@ class Forecaster:
 
         が必要となります。ここでは誤差距離をkm単位から度数単位に変換することを行なっています。これが
 
-        求める標準偏差そのものになります。適度な度数の幅を定め、その幅で緯度のみをずらしながら誤差距
-
-        離に近くなるまでずらします。誤差距離に近くなった時の緯度とずらされる前の緯度の差がkmを度数に
-
-        置き換えた数値になります。これを緯度の標準偏差として用います。
+        求める標準偏差そのものになります。緯度1度分の長さ(約110.574km)で誤差距離を割った値を緯度の標準偏差として用います。
 
-        わざわざこのようにして求めているのは緯度1度、経度1度の長さは緯度によって変わってしまうからで
+        緯度1度、経度1度の長さは緯度によって変わってしまいます。緯度は比較的差が小さいですが経度は大
 
-        す。緯度は比較的差が小さいですが経度は大きいため緯度に対応し都度求める必要があります。
+        きいため緯度に対応し都度求める必要があります。
 
         ##############################################################################
 
         引数 :
             error_radius_km (int) : その時刻の正確な座標からの平均的な座標のずれ[km](誤差距離)
-            original_point (tuple) : original_dataにおける該当時刻の台風の座標
+            original_point (tuple) : original_dataにおける該当時刻の台風の座標(各要素は配列でも可)
 
 
         戻り値 :
-            lat_sd (float) : 緯度の標準偏差として用いられる値。distanceが誤差距離にほぼ等しい時
-                             のtemp_latとoriginal_point_latの差
+            lat_sd (float) : 緯度の標準偏差として用いられる値。誤差距離を緯度の度数に換算したもの
 
         #############################################################################
         """
 
-        original_point_lat = original_point[0]
-        original_point_lon = original_point[1]
-        distance = 0
-
-        # 緯度1度分の距離がだいたい110〜112km
-        # 1kmの場合の度数を(1/112)とし、誤差距離の30分の1ずつ調べることとする
-        split_deg_num = (1 / 112) * (error_radius_km / 30)
-        temp_lat = original_point_lat
-
-        while distance < error_radius_km:
-            temp_lat = temp_lat + split_deg_num
-            temp_point = (temp_lat, original_point_lon)
-
-            distance = geodesic(original_point, temp_point).km
-
-        lat_sd = temp_lat - original_point_lat
+        # 緯度1度分の距離はおおよそ110.574km(WGS84の子午線弧長による近似)
+        lat_sd = error_radius_km / 110.574
 
         return lat_sd
 
@@ -138,46 +166,32 @@ class Forecaster:
 
         が必要となります。ここでは誤差距離をkm単位から度数単位に変換することを行なっています。これが
 
-        求める標準偏差そのものになります。適度な度数の幅を定め、その幅で経度のみをずらしながら誤差距
-
-        離に近くなるまでずらします。誤差距離に近くなった時の経度とずらされる前の経度の差がkmを度数に
+        求める標準偏差そのものになります。経度1度分の長さ(約111.320km×cos(緯度))で誤差距離を割った値を経度の標準偏差として用います。
 
-        置き換えた数値になります。これを経度の標準偏差として用います。
+        緯度1度、経度1度の長さは緯度によって変わってしまいます。緯度は比較的差が小さいですが経度は大
 
-        わざわざこのようにして求めているのは緯度1度、経度1度の長さは緯度によって変わってしまうからで
-
-        す。緯度は比較的差が小さいですが経度は大きいため緯度に対応し都度求める必要があります。
+        きいため緯度に対応し都度求める必要があります。
 
         #############################################################################
 
         引数 :
             error_radius_km (int) : その時刻の正確な座標からの平均的な座標のずれ[km](誤差距離)
-            original_point (tuple) : original_dataにおける該当時刻の台風の座標
+            original_point (tuple) : original_dataにおける該当時刻の台風の座標(各要素は配列でも可)
 
 
         戻り値 :
-            lon_sd (float) : 緯度の標準偏差として用いられる値。distanceが誤差距離にほぼ等しい時
-                             のtemp_lonとoriginal_point_lonの差
+            lon_sd (float) : 経度の標準偏差として用いられる値。誤差距離を経度の度数に換算したもの
 
         #############################################################################
         """
 
-        original_point_lat = original_point[0]
-        original_point_lon = original_point[1]
-        distance = 0
-
-        # 経度1度分の距離がだいたい北緯0で112km、北緯70で38km
-        # 1kmの場合の度数を(1/112)とし、誤差距離の30分の1ずつ調べることとする
-        split_deg_num = (1 / 112) * (error_radius_km / 30)
-        lon = original_point_lon
-
-        while distance < error_radius_km:
-            lon = lon + split_deg_num
-            temp_point = (original_point_lat, lon)
-
-            distance = geodesic(original_point, temp_point).km
-
-        lon_sd = lon - original_point_lon
+        # 経度1度分の距離はおおよそ111.320km*cos(緯度)
+        # cos(緯度)は緯度を1度単位に丸めて表から引く(誤差距離の精度に対して十分)
+        lat_index = np.clip(np.round(original_point[0]).astype(int) + 90, 0, 180)
+        cos_lat = np.take(_COS_LAT_TABLE, lat_index)
+        # 高緯度で0除算にならないようにcos(緯度)の下限を設ける
+        cos_lat = np.maximum(cos_lat, 1e-6)
+        lon_sd = error_radius_km / (111.320 * cos_lat)
 
         return lon_sd
 
@@ -216,52 +230,47 @@ class Forecaster:
         start_forecast_time = current_time + time_step * 3600
         last_forecast_time = current_time + unix_forecast_time
 
-        forecast_true_data = self.original_data.filter(
-            (pl.col("unixtime") >= start_forecast_time)
-            & (pl.col("unixtime") <= last_forecast_time)
+        # 時刻順に並んだデータから予報期間の範囲を二分探索で求めて切り出す
+        start_index = int(
+            np.searchsorted(self._unixtime_arr, start_forecast_time, side="left")
+        )
+        end_index = int(
+            np.searchsorted(self._unixtime_arr, last_forecast_time, side="right")
+        )
+        forecast_true_data = self.original_data.slice(
+            start_index, end_index - start_index
         )
-
-        unix_list = []
-        ty_num_list = []
-        lat_list = []
-        lon_list = []
-
-        forecast_lat_list = []
-        forecast_lon_list = []
 
         # unix,ty_num,lat,lonが少なくともあれば良い
-        rep_num = len(forecast_true_data)
+        unix_arr = forecast_true_data["unixtime"].to_numpy()
+        ty_num_arr = forecast_true_data["TYPHOON NUMBER"].to_numpy()
+        lat_arr = forecast_true_data["LAT"].to_numpy()
+        lon_arr = forecast_true_data["LON"].to_numpy()
 
-        if rep_num != 0:
-            for i in range(rep_num):
-                unix_list.append(forecast_true_data[i, "unixtime"])
-                ty_num_list.append(forecast_true_data[i, "TYPHOON NUMBER"])
-                lat_list.append(forecast_true_data[i, "LAT"])
-                lon_list.append(forecast_true_data[i, "LON"])
-
-                true_point = (lat_list[i], lon_list[i])
+        rep_num = len(forecast_true_data)
 
-                advance_time_hour = (unix_list[i] - current_time) / 3600
-                error_radius_km = self.cal_error_radius_km(time_step, advance_time_hour)
+        # 全データの誤差距離と標準偏差をまとめて計算する
+        true_point = (lat_arr, lon_arr)
 
-                lat_sd = self.cal_forecast_point_lat_sd(error_radius_km, true_point)
-                lon_sd = self.cal_forecast_point_lon_sd(error_radius_km, true_point)
+        advance_time_hour = (unix_arr - current_time) / 3600
+        error_radius_km = self.cal_error_radius_km(time_step, advance_time_hour)
 
-                forecast_lat = random.gauss(lat_list[i], lat_sd)
-                forecast_lon = random.gauss(lon_list[i], lon_sd)
+        lat_sd = self.cal_forecast_point_lat_sd(error_radius_km, true_point)
+        lon_sd = self.cal_forecast_point_lon_sd(error_radius_km, true_point)
 
-                forecast_lat_list.append(forecast_lat)
-                forecast_lon_list.append(forecast_lon)
+        # 正規分布に従う乱数をまとめて生成する
+        forecast_lat_arr = lat_arr + lat_sd * self.rng.normal(0.0, 1.0, rep_num)
+        forecast_lon_arr = lon_arr + lon_sd * self.rng.normal(0.0, 1.0, rep_num)
 
         forecast_data = pl.DataFrame(
-            {
-                "unixtime": unix_list,
-                "TYPHOON NUMBER": ty_num_list,
-                "TRUE_LAT": lat_list,
-                "TRUE_LON": lon_list,
-                "FORE_LAT": forecast_lat_list,
-                "FORE_LON": forecast_lon_list,
-            }
+            [
+                pl.Series("unixtime", unix_arr, dtype=pl.Int64),
+                pl.Series("TYPHOON NUMBER", ty_num_arr, dtype=pl.Int64),
+                pl.Series("TRUE_LAT", lat_arr, dtype=pl.Float64),
+                pl.Series("TRUE_LON", lon_arr, dtype=pl.Float64),
+                pl.Series("FORE_LAT", forecast_lat_arr, dtype=pl.Float64),
+                pl.Series("FORE_LON", forecast_lon_arr, dtype=pl.Float64),
+            ]
         )
         # forecast_data.columns=["unixtime","TYPHOON NUMBER","TRUE_LAT","TRUE_LON","FORE_LAT","FORE_LON"]
 
@@ -0,0 +1,110 @@
+import math
+
+# 地球の平均半径[km]
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    ############################ def haversine_km ############################
+
+    [ 説明 ]
+
+    2点間の大円距離をhaversine公式で計算する関数です。
+
+    ##############################################################################
+
+    引数 :
+        lat1 (float) : 地点1の緯度
+        lon1 (float) : 地点1の経度
+        lat2 (float) : 地点2の緯度
+        lon2 (float) : 地点2の経度
+
+
+    戻り値 :
+        distance (float) : 2点間の距離(km)
+
+    #############################################################################
+    """
+
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    distance = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+    return distance
+
+
+def position_trig(lat, lon):
+    """
+    ############################ def position_trig ############################
+
+    [ 説明 ]
+
+    ある地点について、haversine公式で使う三角関数の値を事前に計算する関数です。
+
+    同じ地点からの距離を何度も計算する場合に使います。
+
+    ##############################################################################
+
+    引数 :
+        lat (float) : 地点の緯度
+        lon (float) : 地点の経度
+
+
+    戻り値 :
+        trig (taple) : 地点の(緯度[rad],経度[rad],緯度の余弦)
+
+    #############################################################################
+    """
+
+    lat_rad = math.radians(lat)
+    lon_rad = math.radians(lon)
+
+    trig = (lat_rad, lon_rad, math.cos(lat_rad))
+
+    return trig
+
+
+def haversine_from_trig_km(origin_trig, lat, lon):
+    """
+    ############################ def haversine_from_trig_km ############################
+
+    [ 説明 ]
+
+    position_trigで事前計算した地点から別の地点までの大円距離をhaversine公式で計算する関数です。
+
+    毎回計算し直すのは相手側の座標の三角関数のみです。
+
+    ##############################################################################
+
+    引数 :
+        origin_trig (taple) : position_trigで計算した基準地点の値
+        lat (float) : 相手側の地点の緯度
+        lon (float) : 相手側の地点の経度
+
+
+    戻り値 :
+        distance (float) : 2点間の距離(km)
+
+    #############################################################################
+    """
+
+    origin_lat_rad, origin_lon_rad, origin_cos_lat = origin_trig
+    phi = math.radians(lat)
+
+    a = (
+        math.sin((phi - origin_lat_rad) / 2) ** 2
+        + origin_cos_lat
+        * math.cos(phi)
+        * math.sin((math.radians(lon) - origin_lon_rad) / 2) ** 2
+    )
+    distance = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+    return distance
@@ -1,3 +1,18 @@
+import numpy as np
+import polars as pl
+
+# 中継貯蔵拠点の行動の記録(brance_condition)のコード
+COND_IN_STORAGE = 0
+COND_CALL_SHIP1 = 1
+COND_CALL_SHIP2 = 2
+COND_CANT_CALL = 3
+
+# 出力時にコードから復元する文字列(インデックスがコードに対応)
+BRANCH_CONDITION_LABELS = np.array(
+    ["while in storage", "call ship1", "call ship2", "can't call anyone"]
+)
+
+
 class Storage_base:
     """
     ############################### class storage_base ###############################
@@ -27,27 +42,49 @@ class Storage_base:
         call_ship1 (int) : support_ship_1を呼ぶフラグ
         call_ship2 (int) : support_ship_1を呼ぶフラグ
         call_per (int) : supprotSHIPを呼ぶ貯蔵パーセンテージ
+        _call_threshold (float) : supportSHIPを呼ぶ貯蔵量の閾値(基準とするsupportSHIPの蓄電容量のcall_per%)
+        brance_condition (int) : 中継貯蔵拠点の行動の記録(COND_*のコード)
 
     """
 
     ####################################  パラメータ  ######################################
 
-    max_storage = 0
-    storage = 0
-    call_num = 0
-    call_ship1 = 0
-    call_ship2 = 0
-    call_per = 60
-    brance_condition = "while in storage"
+    # 毎時刻更新される属性が多いため、__dict__を持たせず固定のスロットに格納する
+    __slots__ = (
+        "locate",
+        "max_storage",
+        "storage",
+        "call_num",
+        "call_ship1",
+        "call_ship2",
+        "call_per",
+        "_call_threshold",
+        "brance_condition",
+        "_stepped_ships",
+        "_storage_arr",
+        "_storage_per_arr",
+        "_condition_arr",
+        "_output_index",
+    )
 
     # 南鳥島
     # lat = 24
     # lon = 153
     # locate = (lat, lon)
 
-    def __init__(self, locate, max_storage) -> None:
+    def __init__(self, locate, max_storage_wh, support_ship_max_storage_wh) -> None:
         self.locate = locate
-        self.max_storage = max_storage
+        self.max_storage = max_storage_wh
+        self.storage = 0
+        self.call_num = 0
+        self.call_ship1 = 0
+        self.call_ship2 = 0
+        self.call_per = 60
+        # supportSHIPを呼ぶ貯蔵量の閾値は時刻によって変わらないため、ここで一度だけ計算する
+        self._call_threshold = support_ship_max_storage_wh * (self.call_per / 100)
+        self.brance_condition = COND_IN_STORAGE
+        # その時刻で既に状態を更新したsupportSHIP
+        self._stepped_ships = set()
 
     ####################################  メソッド  ######################################
 
@@ -81,47 +118,133 @@ class Storage_base:
         呼ぶまでの関数なので、読んだ後のsupportSHIPが帰るフェーズは別で記載している。
 
         """
-        if (support_ship_1.arrived_supplybase == 1) or (
-            self.call_ship1 == 1
+        if (
+            support_ship_1.arrived_supplybase or self.call_ship1 == 1
         ):  # support_ship_1が活動可能な場合
-            self.brance_condition = "call ship1"
-            self.call_ship1 = 1
-            support_ship_1.get_next_ship_state(
-                self.locate, year, current_time, time_step
+            self.brance_condition = COND_CALL_SHIP1
+            self.call_ship1 = self._call_ship(
+                support_ship_1, year, current_time, time_step
             )
 
-            if support_ship_1.arrived_storagebase == 1:
-                self.call_ship1 = 0
-                if self.storage <= support_ship_1.max_storage:
-                    support_ship_1.storage = support_ship_1.storage + self.storage
-                    self.storage = 0
-                else:
-                    support_ship_1.storage = support_ship_1.max_storage
-                    self.storage = self.storage - support_ship_1.max_storage
-
-                self.call_num = self.call_num + 1
-
-        elif (support_ship_2.arrived_supplybase == 1) or (
-            self.call_ship2 == 1
+        elif (
+            support_ship_2.arrived_supplybase or self.call_ship2 == 1
         ):  # support_ship_1がダメでsupport_ship_2が活動可能な場合
-            self.brance_condition = "call ship2"
-            self.call_ship2 = 1
-            support_ship_2.get_next_ship_state(
-                self.locate, year, current_time, time_step
+            self.brance_condition = COND_CALL_SHIP2
+            self.call_ship2 = self._call_ship(
+                support_ship_2, year, current_time, time_step
             )
+        else:  # 両方ダメな場合
+            self.brance_condition = COND_CANT_CALL
 
-            if support_ship_2.arrived_storagebase == 1:
-                self.call_ship2 = 0
-                if self.storage <= support_ship_2.max_storage:
-                    support_ship_2.storage = support_ship_2.storage + self.storage
-                    self.storage = 0
-                else:
-                    support_ship_2.storage = support_ship_2.max_storage
-                    self.storage = self.storage - support_ship_2.max_storage
+    def _call_ship(self, support_ship, year, current_time, time_step):
+        """
+        ############################ def _call_ship ############################
 
-                self.call_num = self.call_num + 1
-        else:  # 両方ダメな場合
-            self.brance_condition = "can't call anyone"
+        [ 説明 ]
+
+        呼び出したsupportSHIPを動かし、中継貯蔵拠点に到着していれば貯蔵しているエネルギーを渡す関数。
+
+        ##############################################################################
+
+        引数 :
+            support_ship (class) : 呼び出すSupport_shipクラスのインスタンス
+            year (int) : シミュレーションを行う年
+            current_time (int) : シミュレーション上の現在時刻(unixtime)
+            time_step (int) : シミュレーションにおける時間の進み幅[hours]
+
+
+        戻り値 :
+            call_ship (int) : 次の時刻も呼び出しを続けるかのフラグ
+
+        #############################################################################
+        """
+
+        # operation_baseで更新済みの場合は同じ時刻で二重に動かさない
+        if support_ship not in self._stepped_ships:
+            support_ship.get_next_ship_state(self.locate, year, current_time, time_step)
+
+        if support_ship.arrived_storagebase:
+            if self.storage <= support_ship.max_storage:
+                support_ship.storage = support_ship.storage + self.storage
+                self.storage = 0
+            else:
+                support_ship.storage = support_ship.max_storage
+                self.storage = self.storage - support_ship.max_storage
+
+            self.call_num = self.call_num + 1
+
+            return 0
+
+        return 1
+
+    def set_outputs(self, n_steps):
+        """
+        ############################ def set_outputs ############################
+
+        [ 説明 ]
+
+        中継貯蔵拠点の状態を記録する出力用の配列を、シミュレーションの記録回数分だけ事前に確保する関数。
+
+        """
+
+        self._storage_arr = np.empty(n_steps, dtype=np.float64)
+        self._storage_per_arr = np.empty(n_steps, dtype=np.float32)
+        self._condition_arr = np.empty(n_steps, dtype=np.uint8)
+        self._output_index = 0
+
+    def outputs_append(self):
+        """
+        ############################ def outputs_append ############################
+
+        [ 説明 ]
+
+        その時刻での中継貯蔵拠点の状態を出力用の配列に記録する関数。
+
+        """
+
+        i = self._output_index
+        self._storage_arr[i] = self.storage
+        self._storage_per_arr[i] = self.storage / self.max_storage * 100
+        self._condition_arr[i] = self.brance_condition
+        self._output_index = i + 1
+
+    def get_outputs(self, unix, date):
+        """
+        ############################ def get_outputs ############################
+
+        [ 説明 ]
+
+        記録した中継貯蔵拠点の状態をまとめてデータフレームにする関数。
+
+        ##############################################################################
+
+        引数 :
+            unix (list) : 各記録時刻のunixtime
+            date (list) : 各記録時刻のdatetime
+
+
+        戻り値 :
+            data (dataflame) : 中継貯蔵拠点の状態の記録
+
+        #############################################################################
+        """
+
+        # シミュレーションが途中で終わった場合に備え、記録済みの部分だけを使う
+        n = self._output_index
+
+        data = pl.DataFrame(
+            [
+                pl.Series("unixtime", unix),
+                pl.Series("datetime", date),
+                pl.Series("STORAGE[Wh]", self._storage_arr[:n]),
+                pl.Series("STORAGE PER[%]", self._storage_per_arr[:n]),
+                pl.Series(
+                    "BRANCH CONDITION", BRANCH_CONDITION_LABELS[self._condition_arr[:n]]
+                ).cast(pl.Categorical),
+            ]
+        )
+
+        return data
 
     def operation_base(
         self, TPGship1, support_ship_1, support_ship_2, year, current_time, time_step
@@ -137,21 +260,23 @@ class Storage_base:
 
         # 貯蔵量の更新
         self.storage_elect(TPGship1)
-        self.brance_condition = "while in storage"
+        self.brance_condition = COND_IN_STORAGE
+        self._stepped_ships.clear()
 
         # supportSHIPの寄港動作完遂までは動かす。呼び出しもキャンセル。
-        if support_ship_1.arrived_supplybase == 0:
+        if not support_ship_1.arrived_supplybase:
             support_ship_1.get_next_ship_state(
                 self.locate, year, current_time, time_step
             )
+            self._stepped_ships.add(support_ship_1)
 
-        if support_ship_2.arrived_supplybase == 0:
+        if not support_ship_2.arrived_supplybase:
             support_ship_2.get_next_ship_state(
                 self.locate, year, current_time, time_step
             )
+            self._stepped_ships.add(support_ship_2)
 
-        judge = support_ship_1.max_storage * (self.call_per / 100)
-        if self.storage >= judge:
+        if self.storage >= self._call_threshold:
             self.supply_elect(
                 support_ship_1, support_ship_2, year, current_time, time_step
             )
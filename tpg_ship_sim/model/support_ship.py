@@ -1,5 +1,120 @@
+import math
+
 import numpy as np
-from geopy.distance import geodesic
+import polars as pl
+
+# 補助船の状態(state)のコード
+# 中継貯蔵拠点へ向かう状態を小さい値にまとめ、次の行動を1回の比較で決められるようにする
+STATE_AT_SUPPLY = 0
+STATE_EN_ROUTE_STORAGE = 1
+STATE_AT_STORAGE = 2
+STATE_EN_ROUTE_SUPPLY = 3
+
+# 補助船の行動の記録(brance_condition)のコード
+COND_NO_ACTION = 0
+COND_ARRIVAL_STORAGE = 1
+COND_GO_STORAGE = 2
+COND_ARRIVAL_SUPPLY = 3
+COND_GO_SUPPLY = 4
+
+# 出力時にコードから復元する文字列(インデックスがコードに対応)
+BRANCH_CONDITION_LABELS = np.array(
+    [
+        "no action",
+        "arrival at storage Base",
+        "go to storage Base",
+        "arrival at supply Base",
+        "go to supply Base",
+    ]
+)
+
+
+def _planar_distance_km(ship_lat, ship_lon, target_lat, target_lon):
+    """
+    ############################ def _planar_distance_km ############################
+
+    [ 説明 ]
+
+    現在地から目標地点までの距離を、局所的な平面近似で計算する関数です。
+
+    _next_positionは緯度経度の差で直線的に補間するので、到着の判断もこの距離で行います。
+
+    ##############################################################################
+
+    引数 :
+        ship_lat (float) : 現在地の緯度
+        ship_lon (float) : 現在地の経度
+        target_lat (float) : 目標地点の緯度
+        target_lon (float) : 目標地点の経度
+
+
+    戻り値 :
+        distance (float) : 2点間の距離(km)
+
+    #############################################################################
+    """
+
+    mean_lat = math.radians((target_lat + ship_lat) / 2)
+    distance = math.hypot(
+        (target_lon - ship_lon) * math.cos(mean_lat) * 111.320,
+        (target_lat - ship_lat) * 110.574,
+    )
+
+    return distance
+
+
+def _next_position(ship_lat, ship_lon, target_lat, target_lon, speed_kmh, time_step):
+    """
+    ############################ def _next_position ############################
+
+    [ 説明 ]
+
+    現在地から目標地点まで直線に進んだ場合に、time_step後にいる座標を計算する関数です。
+
+    属性を参照しない純粋な数値計算のみで構成しています。
+
+    ##############################################################################
+
+    引数 :
+        ship_lat (float) : 現在地の緯度
+        ship_lon (float) : 現在地の経度
+        target_lat (float) : 目標地点の緯度
+        target_lon (float) : 目標地点の経度
+        speed_kmh (float) : km/hに変換された船速
+        time_step (int) : シミュレーションにおける時間の進み幅[hours]
+
+
+    戻り値 :
+        next_position (taple) : time_step後の座標(緯度,経度)
+
+    #############################################################################
+    """
+
+    # 船がtime_step時間で進める距離
+    advance_distance = speed_kmh * time_step
+
+    # 緯度・経度の差
+    lat_difference = target_lat - ship_lat
+    lon_difference = target_lon - ship_lon
+
+    # 目的地と現在地の距離 [km]
+    # 座標は緯度経度の差で直線的に補間するので、距離も局所的な平面近似で求める
+    Goal_now_distance = _planar_distance_km(ship_lat, ship_lon, target_lat, target_lon)
+
+    # 進める距離と目的地までの距離の比を出す
+    # 比が1を超える場合は目的地に到着できるので1で頭打ちにし、座標を目的地にする
+    distance_ratio = (
+        0.0
+        if Goal_now_distance == 0
+        else min(advance_distance / Goal_now_distance, 1.0)
+    )
+
+    next_lat = lat_difference * distance_ratio + ship_lat
+    next_lon = lon_difference * distance_ratio + ship_lon
+
+    next_position = (next_lat, next_lon)
+
+    return next_position
 
 
 class Support_ship:
@@ -31,30 +146,67 @@ class Support_ship:
         support_ship_speed (float) : 補助船の最大船速
         storage (float) : 中継貯蔵拠点のその時刻での蓄電量
         ship_gene (int) : 補助船が発生したかどうかのフラグ
-        arrived_supplybase (int) : 供給拠点に到着したかどうかのフラグ
-        arrived_storagebase (int) : 中継貯蔵拠点に到着したかどうかのフラグ
+        state (int) : 補助船の状態(STATE_*のコード)
+        arrived_supplybase (bool) : 供給拠点にいるかどうか(stateから求める読み取り専用の属性)
+        arrived_storagebase (bool) : 中継貯蔵拠点にいるかどうか(stateから求める読み取り専用の属性)
         target_lat (float) : 補助船の目標地点の緯度
         target_lon (float) : 補助船の目標地点の経度
-        brance_condition (str) : 補助船の行動の記録
+        brance_condition (int) : 補助船の行動の記録(COND_*のコード)
 
     """
 
-    ship_gene = 0
-    storage = 0
-    arrived_supplybase = 1
-    arrived_storagebase = 0
-
-    target_lat = np.nan
-    target_lon = np.nan
-    brance_condition = "no action"
-
-    def __init__(self, supply_base_locate, max_storage_wh, max_speed_kt) -> None:
+    # 毎時刻更新される属性が多いため、__dict__を持たせず固定のスロットに格納する
+    __slots__ = (
+        "supplybase_lat",
+        "supplybase_lon",
+        "ship_lat",
+        "ship_lon",
+        "max_storage",
+        "support_ship_speed",
+        "_speed_kmh",
+        "storage",
+        "ship_gene",
+        "state",
+        "target_lat",
+        "target_lon",
+        "brance_condition",
+        "speed_kt",
+        "target_distance",
+        "_target_lat_arr",
+        "_target_lon_arr",
+        "_ship_lat_arr",
+        "_ship_lon_arr",
+        "_storage_arr",
+        "_storage_per_arr",
+        "_condition_arr",
+        "_output_index",
+    )
+
+    def __init__(self, supply_base_locate, max_storage_wh, ship_speed_kt) -> None:
         self.supplybase_lat = supply_base_locate[0]
         self.supplybase_lon = supply_base_locate[1]
         self.ship_lat = supply_base_locate[0]
         self.ship_lon = supply_base_locate[1]
         self.max_storage = max_storage_wh
-        self.support_ship_speed = max_speed_kt
+        self.support_ship_speed = ship_speed_kt
+        # 航行時の船速は一定なので、km/hへの変換は1回だけ行って保持する
+        self._speed_kmh = ship_speed_kt * 1.852
+
+        self.ship_gene = 0
+        self.storage = 0
+        self.state = STATE_AT_SUPPLY
+
+        self.target_lat = math.nan
+        self.target_lon = math.nan
+        self.brance_condition = COND_NO_ACTION
+
+    @property
+    def arrived_supplybase(self):
+        return self.state == STATE_AT_SUPPLY
+
+    @property
+    def arrived_storagebase(self):
+        return self.state == STATE_AT_STORAGE
 
     # 状態量計算
     def get_distance(self, storage_base_position):
@@ -65,6 +217,8 @@ class Support_ship:
 
         補助船(または拠点位置or観測地点)からUUVへの距離を計算する関数です。
 
+        到着の判断と記録する目標地点との距離を揃えるため、移動の補間と同じ平面近似の距離を返します。
+
         ##############################################################################
 
         引数 :
@@ -77,89 +231,45 @@ class Support_ship:
         #############################################################################
         """
 
-        A_position = (self.ship_lat, self.ship_lon)
-
         # AーB間距離
-        distance = geodesic(A_position, storage_base_position).km
+        distance = _planar_distance_km(
+            self.ship_lat,
+            self.ship_lon,
+            storage_base_position[0],
+            storage_base_position[1],
+        )
 
         return distance
 
     # 状態量計算
-    def change_kt_kmh(self):
+    def get_distance_to_supplybase(self):
         """
-        ############################ def change_kt_kmh ############################
+        ############################ def get_distance_to_supplybase ############################
 
         [ 説明 ]
 
-        ktをkm/hに変換する関数です
-
-        ##############################################################################
-
-
-        戻り値 :
-            speed_kmh (float) : km/hに変換された船速
-
-        #############################################################################
-        """
-
-        speed_kmh = self.speed_kt * 1.852
-
-        return speed_kmh
-
-    # 拠点または観測地点からuuvまでの距離取得
-    def get_base_dis_data(self, storage_base_position):
-        """
-        ############################ def get_base_dis_data ############################
-
-        [ 説明 ]
-
-        get_target_dataで選ばれ、追従対象となった台風のcurrent_time + time_stepの時刻での座標を取得する関数です。
-
-        存在しない場合は空のデータフレームが返ります。
-
-        本関数は複数の供給拠点が本土にある場合に初めて有効となる。今後の拡張を見越し、事前実装する。
-
-        課題点としては、各拠点で運用される補助船がおそらく共通化してしまうことである。
+        補助船から供給拠点への距離を計算する関数です。
 
-        コスト計算をするなら拠点ごとに設定する必要がある。
+        到着の判断に使うので、移動の補間と同じ平面近似の距離を返します。
 
         ##############################################################################
 
-        引数 :
-            current_time (int) : シミュレーション上の現在時刻[unixtime]
-            time_step (int) : シミュレーションにおける時間の進み幅[hours]
-            storage_base_position (taple) : 中継貯蔵拠点の座標(緯度,経度)
-
 
         戻り値 :
-            self.route_plus_dis_data (dataflame) : 供給拠点または中継貯蔵拠点からの距離が追加されたデータ
+            distance (float) : 補助船から供給拠点への距離(km)
 
         #############################################################################
         """
-        distance_list = []
-
-        if len(self.base_data) != 0:
-            for i in range(len(self.base_data)):
 
-                A_position = (self.base_data[i, "LAT"], self.base_data[i, "LON"])
-                distance = geodesic(A_position, storage_base_position).km
-                distance_list.append(distance)
-
-            # 台風の距離を一応書いておく
-            base_plus_dis_data = self.base_data.with_columns(
-                pl.Series(distance_list).alias("distance")
-            )
-
-            # 距離が近い順番に並び替え
-            base_plus_dis_data = base_plus_dis_data.select(
-                pl.col("*").sort_by("distance", descending=False)
-            )
+        distance = _planar_distance_km(
+            self.ship_lat, self.ship_lon, self.supplybase_lat, self.supplybase_lon
+        )
 
-        return base_plus_dis_data
+        return distance
 
     # 状態量計算
     # 次の時刻での船の座標
-    def get_next_position(self, time_step):
+    def get_next_position(self, time_step, speed_kmh):
         """
         ############################ def get_next_position ############################
 
@@ -177,93 +287,20 @@ class Support_ship:
 
         引数 :
             time_step (int) : シミュレーションにおける時間の進み幅[hours]
+            speed_kmh (float) : km/hに変換された船速
 
 
         #############################################################################
         """
 
-        target_position = (self.target_lat, self.target_lon)
-
-        # 目的地と現在地の距離
-        Goal_now_distance = self.get_distance(target_position)  # [km]
-
-        # 船がtime_step時間で進める距離
-        advance_distance = self.change_kt_kmh() * time_step
-
-        # 緯度の差
-        g_lat = self.target_lat
-        n_lat = self.ship_lat
-
-        lat_difference = g_lat - n_lat
-
-        # 経度の差
-        g_lon = self.target_lon
-        n_lon = self.ship_lon
-
-        lon_difference = g_lon - n_lon
-
-        # 進める距離と目的地までの距離の比を出す
-        if Goal_now_distance != 0:
-            distance_ratio = advance_distance / Goal_now_distance
-        else:
-            distance_ratio = 0
-
-        # 念の為の分岐
-        # 距離の比が1を超える場合目的地に到着できることになるので座標を目的地へ、そうでないなら当該距離進める
-
-        if distance_ratio < 1 and distance_ratio > 0:
-
-            # 次の時間にいるであろう緯度
-            next_lat = lat_difference * distance_ratio + n_lat
-
-            # 次の時間にいるであろう経度
-            next_lon = lon_difference * distance_ratio + n_lon
-
-        else:
-
-            # 次の時間にいるであろう緯度
-            next_lat = g_lat
-
-            # 次の時間にいるであろう経度
-            next_lon = g_lon
-
-        next_position = (next_lat, next_lon)
-        self.ship_lat = next_lat
-        self.ship_lon = next_lon
-
-    # まだ使わないver5では拠点は1つ
-    def set_start_position(self, storage_base_position):
-
-        self.change_ship = 0
-        self.base_plus_dis_data = self.get_base_dis_data(storage_base_position)
-        if not np.isnan(self.ship_lat):
-            uuv_ship_dis = self.get_distance(storage_base_position)
-            if uuv_ship_dis > self.base_plus_dis_data[0, "distance"]:
-                self.change_ship = 1
-                # self.ship_lat = self.route_plus_dis_data[0,"LAT"]
-                # self.ship_lon = self.route_plus_dis_data[0,"LON"]
-                # self.base_lat = self.route_plus_dis_data[0,"LAT"]
-                # self.base_lon = self.route_plus_dis_data[0,"LON"]
-            else:
-                # 更新なし、その場からuuvへ向かう
-                self.ship_gene = 1
-                self.arrived_supplybase = 0
-                self.arrived_storagebase = 0
-
-                self.target_lat = storage_base_position[0]
-                self.target_lon = storage_base_position[1]
-
-        else:
-            self.ship_lat = self.base_plus_dis_data[0, "LAT"]
-            self.ship_lon = self.base_plus_dis_data[0, "LON"]
-            self.base_lat = self.base_plus_dis_data[0, "LAT"]
-            self.base_lon = self.base_plus_dis_data[0, "LON"]
-            self.arrived_supplybase = 0
-            self.arrived_storagebase = 0
-            self.ship_gene = 1
-
-            self.target_lat = storage_base_position[0]
-            self.target_lon = storage_base_position[1]
+        self.ship_lat, self.ship_lon = _next_position(
+            self.ship_lat,
+            self.ship_lon,
+            self.target_lat,
+            self.target_lon,
+            speed_kmh,
+            time_step,
+        )
 
     def go_storagebase_action(self, storage_base_position, time_step):
         """
@@ -291,24 +328,21 @@ class Support_ship:
         self.target_lon = storage_base_position[1]
 
         storagebase_ship_dis_time = (
-            self.get_distance(storage_base_position) / self.change_kt_kmh()
+            self.get_distance(storage_base_position) / self._speed_kmh
         )
-        self.arrived_storagebase = 0
-        self.arrived_supplybase = 0
 
         # timestep後にUUVに船がついている場合
         if storagebase_ship_dis_time <= time_step:
-            self.brance_condition = "arrival at storage Base"
-            self.arrived_storagebase = 1  # 到着のフラグ
-            self.arrived_supplybase = 0
+            self.brance_condition = COND_ARRIVAL_STORAGE
+            self.state = STATE_AT_STORAGE  # 到着
             self.ship_lat = storage_base_position[0]
             self.ship_lon = storage_base_position[1]
 
             self.speed_kt = 0
 
         else:
-            self.brance_condition = "go to storage Base"
-            self.arrived_storagebase = 0
+            self.brance_condition = COND_GO_STORAGE
+            self.state = STATE_EN_ROUTE_STORAGE
 
     def go_supplybase_action(self, time_step):
         """
@@ -333,46 +367,120 @@ class Support_ship:
         self.speed_kt = self.support_ship_speed
         self.target_lat = self.supplybase_lat
         self.target_lon = self.supplybase_lon
-        supplybase_position = (self.supplybase_lat, self.supplybase_lon)
-        uuv_ship_dis_time = (
-            self.get_distance(supplybase_position) / self.change_kt_kmh()
-        )
-        self.arrived_supplybase = 0
+
+        uuv_ship_dis_time = self.get_distance_to_supplybase() / self._speed_kmh
 
         # timestep後にBaseに船がついている場合
         if uuv_ship_dis_time <= time_step:
-            self.brance_condition = "arrival at supply Base"
+            self.brance_condition = COND_ARRIVAL_SUPPLY
             self.ship_gene = 0
-            self.arrived_supplybase = 1  # 到着のフラグ
-            self.arrived_storagebase = 0  # 履歴削除
+            self.state = STATE_AT_SUPPLY  # 到着
             self.ship_lat = self.supplybase_lat
             self.ship_lon = self.supplybase_lon
-            self.target_lat = np.nan
-            self.target_lon = np.nan
-            self.target_distance = np.nan
+            self.target_lat = math.nan
+            self.target_lon = math.nan
+            self.target_distance = math.nan
             self.storage = 0
 
             self.speed_kt = 0
 
         else:
-            self.brance_condition = "go to supply Base"
-            self.arrived_supplybase = 0
+            self.brance_condition = COND_GO_SUPPLY
+            self.state = STATE_EN_ROUTE_SUPPLY
+
+    def set_outputs(self, n_steps):
+        """
+        ############################ def set_outputs ############################
+
+        [ 説明 ]
+
+        補助船の状態を記録する出力用の配列を、シミュレーションの記録回数分だけ事前に確保する関数。
+
+        """
+
+        self._target_lat_arr = np.empty(n_steps, dtype=np.float64)
+        self._target_lon_arr = np.empty(n_steps, dtype=np.float64)
+        self._ship_lat_arr = np.empty(n_steps, dtype=np.float64)
+        self._ship_lon_arr = np.empty(n_steps, dtype=np.float64)
+        self._storage_arr = np.empty(n_steps, dtype=np.float64)
+        self._storage_per_arr = np.empty(n_steps, dtype=np.float32)
+        self._condition_arr = np.empty(n_steps, dtype=np.uint8)
+        self._output_index = 0
+
+    def outputs_append(self):
+        """
+        ############################ def outputs_append ############################
+
+        [ 説明 ]
+
+        その時刻での補助船の状態を出力用の配列に記録する関数。
+
+        """
+
+        i = self._output_index
+        self._target_lat_arr[i] = self.target_lat
+        self._target_lon_arr[i] = self.target_lon
+        self._ship_lat_arr[i] = self.ship_lat
+        self._ship_lon_arr[i] = self.ship_lon
+        self._storage_arr[i] = self.storage
+        self._storage_per_arr[i] = self.storage / self.max_storage * 100
+        self._condition_arr[i] = self.brance_condition
+        self._output_index = i + 1
+
+    def get_outputs(self, unix, date):
+        """
+        ############################ def get_outputs ############################
+
+        [ 説明 ]
+
+        記録した補助船の状態をまとめてデータフレームにする関数。
+
+        ##############################################################################
+
+        引数 :
+            unix (list) : 各記録時刻のunixtime
+            date (list) : 各記録時刻のdatetime
+
+
+        戻り値 :
+            data (dataflame) : 補助船の状態の記録
+
+        #############################################################################
+        """
+
+        # シミュレーションが途中で終わった場合に備え、記録済みの部分だけを使う
+        n = self._output_index
+
+        data = pl.DataFrame(
+            [
+                pl.Series("unixtime", unix),
+                pl.Series("datetime", date),
+                pl.Series("targetLAT", self._target_lat_arr[:n]),
+                pl.Series("targetLON", self._target_lon_arr[:n]),
+                pl.Series("LAT", self._ship_lat_arr[:n]),
+                pl.Series("LON", self._ship_lon_arr[:n]),
+                pl.Series("STORAGE[Wh]", self._storage_arr[:n]),
+                pl.Series("STORAGE PER[%]", self._storage_per_arr[:n]),
+                pl.Series(
+                    "BRANCH CONDITION", BRANCH_CONDITION_LABELS[self._condition_arr[:n]]
+                ).cast(pl.Categorical),
+            ]
+        )
+
+        return data
 
     def get_next_ship_state(self, storage_base_position, year, current_time, time_step):
 
-        if (self.arrived_storagebase == 0) and (self.arrived_supplybase == 1):
-            self.go_storagebase_action(storage_base_position, time_step)
-        elif (self.arrived_storagebase == 1) and (self.arrived_supplybase == 0):
-            self.go_supplybase_action(time_step)
-        elif (self.arrived_storagebase == 0) and (self.arrived_supplybase == 0):
+        # 供給拠点にいるか中継貯蔵拠点へ向かう途中なら中継貯蔵拠点へ、それ以外は供給拠点へ
+        if self.state <= STATE_EN_ROUTE_STORAGE:
             self.go_storagebase_action(storage_base_position, time_step)
         else:
-            self.arrived_supplybase = 0
-            self.arrived_storagebase = 0
+            self.go_supplybase_action(time_step)
 
         # 拠点に帰った場合を弾く
-        if not np.isnan(self.target_lat):
-            self.get_next_position(time_step)
+        if not math.isnan(self.target_lat):
+            # 到着した場合は座標が目的地と一致しているので、航行時の船速で進めても動かない
+            self.get_next_position(time_step, self._speed_kmh)
 
             # 目標地点との距離
             target_position = (self.target_lat, self.target_lon)
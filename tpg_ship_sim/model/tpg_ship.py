@@ -2,7 +2,132 @@ import math
 
 import numpy as np
 import polars as pl
-from geopy.distance import geodesic
+
+from tpg_ship_sim.model.geo import (
+    EARTH_RADIUS_KM,
+    haversine_from_trig_km,
+    haversine_km,
+    position_trig,
+)
+
+# 台風発電船の目標地点(target_name)のコード
+# 台風の場合はTARGET_TYPHOONとし、出力時に台風番号を名前にする
+TARGET_BASE_STATION = 0
+TARGET_STANDBY = 1
+TARGET_TYPHOON = 2
+
+# 出力時にコードから復元する文字列(インデックスがコードに対応、台風の名前は台風番号で置き換える)
+TARGET_NAME_LABELS = np.array(["base station", "Standby position", "typhoon"])
+
+# 台風発電船の行動の記録(brance_condition)のコード
+COND_START_FORECAST = 0
+COND_BATTERY_EXCEEDED = 1
+COND_ARRIVAL_BASE = 2
+COND_RETURN_STANDBY = 3
+COND_ARRIVAL_STANDBY = 4
+COND_CHASE_MAX_SPEED = 5
+COND_ARRIVAL_TYPHOON = 6
+COND_CHASE_TYPHOON = 7
+COND_CHASE_VIA_BASE = 8
+COND_STANDBY_VIA_BASE = 9
+COND_WITHIN_50KM = 10
+
+# 出力時にコードから復元する文字列(インデックスがコードに対応)
+BRANCH_CONDITION_LABELS = np.array(
+    [
+        "start forecast",
+        "battery capacity exceeded specified ratio",
+        "arrival at base station",
+        "returning to standby position as no typhoon",
+        "arrival at standby position",
+        "tracking typhoon at maximum ship speed started",
+        "arrived at typhoon",
+        "tracking typhoon",
+        "tracking typhoon via base",
+        "return standby via base",
+        "within 50km of a typhoon following",
+    ]
+)
+
+
+def _haversine_km_array(origin_trig, lat, lon):
+    """
+    ############################ def _haversine_km_array ############################
+
+    [ 説明 ]
+
+    position_trigで事前計算した地点から複数地点までの大円距離をhaversine公式でまとめて計算する関数です。
+
+    ##############################################################################
+
+    引数 :
+        origin_trig (taple) : position_trigで計算した基準地点の値
+        lat (ndarray) : 各地点の緯度
+        lon (ndarray) : 各地点の経度
+
+
+    戻り値 :
+        distance (ndarray) : 基準地点から各地点までの距離(km)
+
+    #############################################################################
+    """
+
+    origin_lat_rad, origin_lon_rad, origin_cos_lat = origin_trig
+    phi = np.radians(lat)
+
+    a = (
+        np.sin((phi - origin_lat_rad) / 2) ** 2
+        + origin_cos_lat
+        * np.cos(phi)
+        * np.sin((np.radians(lon) - origin_lon_rad) / 2) ** 2
+    )
+    distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+    return distance
+
+
+# 陸地認識に使う緯度帯の境界(p1 ~ p16)と、各緯度帯で海上とみなす経度の下限
+# 緯度50度以上は全て海上とみなし、緯度0度未満は対象外とする
+_LAND_LAT_EDGES = np.array([0, 13, 15, 24, 26, 28, 32.2, 34, 41.2, 44, 50])
+_LAND_LON_LIMITS = np.array(
+    [127.5, 125, 123, 126, 130.1, 132.4, 137.2, 143, 149, 156], dtype=np.float64
+)
+# 緯度帯の番号+1で引く経度の下限(範囲外の両端を含む)
+_LAND_LON_LIMITS_EXT = np.concatenate(([np.inf], _LAND_LON_LIMITS, [-np.inf]))
+
+
+def _sea_mask(lat, lon):
+    """
+    ############################ def _sea_mask ############################
+
+    [ 説明 ]
+
+    予報座標が陸地(日本列島周辺)の外側、つまり海上にあるかどうかを判定する関数です。
+
+    各緯度帯で経度が下限以上であれば海上とみなします。緯度帯の境界上の点は、両側の緯度帯のうち緩い方の下限を使います。
+
+    ##############################################################################
+
+    引数 :
+        lat (ndarray) : 予報座標の緯度
+        lon (ndarray) : 予報座標の経度
+
+
+    戻り値 :
+        mask (ndarray) : 海上にある場合にTrueとなる配列
+
+    #############################################################################
+    """
+
+    band_upper = np.searchsorted(_LAND_LAT_EDGES, lat, side="right")
+    band_lower = np.searchsorted(_LAND_LAT_EDGES, lat, side="left")
+    lon_limit = np.minimum(
+        _LAND_LON_LIMITS_EXT[band_upper], _LAND_LON_LIMITS_EXT[band_lower]
+    )
+
+    mask = (lon >= lon_limit) & (lat >= 0)
+
+    return mask
 
 
 class TPG_ship:
@@ -41,7 +166,7 @@ class TPG_ship:
         total_loss_time (int) : その時刻までの合計電力消費時間
 
         speed_kt (float) : その時刻での台風発電船の船速(kt)
-        target_name (str) : 目標地点の名前。台風の場合は番号の文字列入力。
+        target_name (int) : 目標地点(TARGET_*のコード)。台風の場合は名前にする台風番号を別に保持する。
         base_lat (float) : 拠点の緯度　※現段階では外部から入力が必要。調査で適当な値が求まったらそれを初期代入する予定。
         base_lon (float) : 拠点の経度　※現段階では外部から入力が必要。調査で適当な値が求まったらそれを初期代入する予定。
         standby_lat (float) : 待機位置の緯度　※現段階では外部から入力が必要。調査で適当な値が求まったらそれを初期代入する予定。
@@ -56,7 +181,7 @@ class TPG_ship:
         next_TY_lat (float) : time_step後の目標台風の緯度。ない場合は経度と共に0
         next_TY_lon (float) : time_step後の目標台風の経度。ない場合は緯度と共に0
         next_ship_TY_dis (float) : time_step後の目標台風と台風発電船の距離(km)。ない場合はNaN。
-        brance_condition (str) : 台風発電船が行動分岐のどの分岐になったかを示す
+        brance_condition (int) : 台風発電船が行動分岐のどの分岐になったかを示す(COND_*のコード)
 
         distance_judge_hours (int) : 追従判断基準時間。発電船にとって台風が遠いか近いかを判断する基準。　※本プログラムでは使用しない
         judge_energy_storage_per (int) : 発電船が帰港判断をする蓄電割合。
@@ -68,11 +193,12 @@ class TPG_ship:
 
         normal_ave_speed (float) : 平常時の平均船速(kt)
         max_speed (float) : 最大船速(kt)
+        max_speed_kmh (float) : 最大船速(km/h)
         TY_tracking_speed (float) : 台風を追いかける時の船速(kt)
         speed_kt (float) : その時の船速(kt)
 
         forecast_data (dataflame) : 各時刻の台風の予想座標がわかるデータ。台風番号、時刻、座標を持つ　※Forecasterからもらう必要がある。
-        TY_start_time_list (list) : 全ての台風の発生時刻のリスト　※現段階では外部から入力が必要。調査で適当な値が求まったらそれを初期代入する予定。
+        TY_start_time_list (ndarray) : 全ての台風の発生時刻の配列(台風番号順)　※現段階では外部から入力が必要。調査で適当な値が求まったらそれを初期代入する予定。
         forecast_weight (float) : 台風を評価する際の式で各項につける重みの数値。他の項は(100-forecast_weight)。　※現段階では外部から入力が必要。調査で適当な値が求まったらそれを初期代入する予定。
 
 
@@ -102,12 +228,15 @@ class TPG_ship:
     ) -> None:
         self.ship_lat = initial_position[0]
         self.ship_lon = initial_position[1]
+        self._update_trig()
         self.hull_num = hull_num
         self.storage_method = storage_method
         self.max_storage = max_storage_wh
         self.generator_output = generator_output_w
         self.nomal_ave_speed = ship_return_speed_kt
         self.max_speed = ship_max_speed_kt
+        # 最大船速(km/h)は判断のたびに使うので先に変換しておく
+        self.max_speed_kmh = ship_max_speed_kt * 1.852
 
         self.forecast_weight = forecast_weight
         self.effective_range = typhoon_effective_range
@@ -127,6 +256,8 @@ class TPG_ship:
 
         max_storage , base_lat , base_lon , standby_lat , standby_lonの数値の定義が少なくとも先に必要です。
 
+        消費電力の係数を前計算するため、max_speed_power , generating_facilities_need_max_powerも先に定義してください。
+
         ##############################################################################
 
         """
@@ -143,9 +274,15 @@ class TPG_ship:
         self.total_gene_time = 0
         self.total_loss_time = 0
 
+        # 船速の3乗にかける消費電力の係数(実行中は変わらないので先に計算しておく)
+        self._power_coefficient = (
+            self.max_speed_power + self.generating_facilities_need_max_power
+        ) / (self.max_speed**3)
+
         # 発電船の行動に関する状態量(現状のクラス定義では外部入力不可(更新が内部関数のため))
         self.speed_kt = 0
-        self.target_name = "base station"
+        self.target_name = TARGET_BASE_STATION
+        self._target_name_TY = 0
         self.target_lat = self.base_lat
         self.target_lon = self.base_lon
         self.target_distance = 0
@@ -155,13 +292,174 @@ class TPG_ship:
         self.next_TY_lat = 0
         self.next_TY_lon = 0
         self.next_ship_TY_dis = np.nan
-        self.brance_condition = "start forecast"
+        self.brance_condition = COND_START_FORECAST
 
         # 発電船自律判断システム設定
         self.judge_energy_storage_per = 100
         self.judge_direction = 10
         self.standby_via_base = 0
 
+    ####################################  出力  ######################################
+
+    def set_outputs(self, n_steps):
+        """
+        ############################ def set_outputs ############################
+
+        [ 説明 ]
+
+        台風発電船の状態を記録する出力用の配列を、シミュレーションの記録回数分だけ事前に確保する関数です。
+
+        """
+
+        # 文字列の列はコードで記録し、出力時に文字列へ戻す
+        self._target_name_arr = np.empty(n_steps, dtype=np.int8)
+        self._target_name_TY_arr = np.empty(n_steps, dtype=np.int64)
+        self._target_lat_arr = np.empty(n_steps, dtype=np.float64)
+        self._target_lon_arr = np.empty(n_steps, dtype=np.float64)
+        self._target_dis_arr = np.empty(n_steps, dtype=np.float64)
+        self._target_TY_arr = np.empty(n_steps, dtype=np.int64)
+        self._TY_lat_arr = np.empty(n_steps, dtype=np.float64)
+        self._TY_lon_arr = np.empty(n_steps, dtype=np.float64)
+        self._ship_lat_arr = np.empty(n_steps, dtype=np.float64)
+        self._ship_lon_arr = np.empty(n_steps, dtype=np.float64)
+        self._ship_TY_dis_arr = np.empty(n_steps, dtype=np.float64)
+        self._brance_condition_arr = np.empty(n_steps, dtype=np.int8)
+        self._ship_state_arr = np.empty(n_steps, dtype=np.int8)
+        self._speed_kt_arr = np.empty(n_steps, dtype=np.float32)
+        self._gene_elect_arr = np.empty(n_steps, dtype=np.float64)
+        self._total_gene_time_arr = np.empty(n_steps, dtype=np.int64)
+        self._total_gene_elect_arr = np.empty(n_steps, dtype=np.float64)
+        self._loss_elect_arr = np.empty(n_steps, dtype=np.float64)
+        self._total_loss_time_arr = np.empty(n_steps, dtype=np.int64)
+        self._total_loss_elect_arr = np.empty(n_steps, dtype=np.float64)
+        self._storage_percentage_arr = np.empty(n_steps, dtype=np.float64)
+        self._storage_arr = np.empty(n_steps, dtype=np.float64)
+        self._step = 0
+
+    def outputs_append(self):
+        """
+        ############################ def outputs_append ############################
+
+        [ 説明 ]
+
+        その時刻での台風発電船の状態を出力用の配列に記録する関数です。
+
+        """
+
+        i = self._step
+        self._target_name_arr[i] = self.target_name
+        self._target_name_TY_arr[i] = self._target_name_TY
+        self._target_lat_arr[i] = self.target_lat
+        self._target_lon_arr[i] = self.target_lon
+        self._target_dis_arr[i] = self.target_distance
+        self._target_TY_arr[i] = self.target_TY
+        self._TY_lat_arr[i] = self.next_TY_lat
+        self._TY_lon_arr[i] = self.next_TY_lon
+        self._ship_lat_arr[i] = self.ship_lat
+        self._ship_lon_arr[i] = self.ship_lon
+        self._ship_TY_dis_arr[i] = self.next_ship_TY_dis
+        self._brance_condition_arr[i] = self.brance_condition
+        self._ship_state_arr[i] = self.ship_state
+        self._speed_kt_arr[i] = self.speed_kt
+        self._gene_elect_arr[i] = self.gene_elect
+        self._total_gene_time_arr[i] = self.total_gene_time
+        self._total_gene_elect_arr[i] = self.total_gene_elect
+        self._loss_elect_arr[i] = self.loss_elect
+        self._total_loss_time_arr[i] = self.total_loss_time
+        self._total_loss_elect_arr[i] = self.total_loss_elect
+        self._storage_percentage_arr[i] = self.storage_percentage
+        self._storage_arr[i] = self.storage
+        self._step = i + 1
+
+    def get_outputs(self, unix, date):
+        """
+        ############################ def get_outputs ############################
+
+        [ 説明 ]
+
+        記録した台風発電船の状態をまとめてデータフレームにする関数です。
+
+        ##############################################################################
+
+        引数 :
+            unix (list) : 各記録時刻のunixtime
+            date (list) : 各記録時刻のdatetime
+
+
+        戻り値 :
+            data (dataflame) : 台風発電船の状態の記録
+
+        #############################################################################
+        """
+
+        # シミュレーションが途中で終わった場合に備え、記録済みの部分だけを使う
+        n = self._step
+
+        # 目標地点のコードを文字列に戻す(台風の場合は台風番号を名前にする)
+        target_name_arr = self._target_name_arr[:n]
+        target_name = np.where(
+            target_name_arr == TARGET_TYPHOON,
+            self._target_name_TY_arr[:n].astype(str),
+            TARGET_NAME_LABELS[target_name_arr],
+        )
+
+        # 蓄電割合の状態 : 20%以下→1 , 20%より多く80%より少ない→2 , 80%以上→3 , 100%以上→4
+        # 丸める前のfloat64の値で、全時刻分をまとめて判定する
+        storage_percentage = self._storage_percentage_arr[:n]
+        storage_state = np.select(
+            [
+                storage_percentage <= 20,
+                storage_percentage >= 100,
+                storage_percentage >= 80,
+            ],
+            [1, 4, 3],
+            default=2,
+        ).astype(np.int8)
+
+        data = pl.DataFrame(
+            [
+                pl.Series("unixtime", unix),
+                pl.Series("datetime", date),
+                pl.Series("TARGET LOCATION", target_name).cast(pl.Categorical),
+                pl.Series("TARGET LAT", self._target_lat_arr[:n]),
+                pl.Series("TARGET LON", self._target_lon_arr[:n]),
+                pl.Series("TARGET DISTANCE[km]", self._target_dis_arr[:n]),
+                pl.Series("TARGET TYPHOON", self._target_TY_arr[:n]),
+                pl.Series("TARGET TY LAT", self._TY_lat_arr[:n]),
+                pl.Series("TARGET TY LON", self._TY_lon_arr[:n]),
+                pl.Series("TPGSHIP LAT", self._ship_lat_arr[:n]),
+                pl.Series("TPGSHIP LON", self._ship_lon_arr[:n]),
+                pl.Series("TPG_TY DISTANCE[km]", self._ship_TY_dis_arr[:n]),
+                pl.Series(
+                    "BRANCH CONDITION",
+                    BRANCH_CONDITION_LABELS[self._brance_condition_arr[:n]],
+                ).cast(pl.Categorical),
+                pl.Series("TPGSHIP STATUS", self._ship_state_arr[:n]),
+                pl.Series("SHIP SPEED[kt]", self._speed_kt_arr[:n]),
+                pl.Series("TIMESTEP POWER GENERATION[Wh]", self._gene_elect_arr[:n]),
+                pl.Series("TOTAL GENE TIME[h]", self._total_gene_time_arr[:n]),
+                pl.Series("TOTAL POWER GENERATION[Wh]", self._total_gene_elect_arr[:n]),
+                pl.Series("TIMESTEP POWER CONSUMPTION[Wh]", self._loss_elect_arr[:n]),
+                pl.Series("TOTAL CONS TIME[h]", self._total_loss_time_arr[:n]),
+                pl.Series(
+                    "TOTAL POWER CONSUMPTION[Wh]", self._total_loss_elect_arr[:n]
+                ),
+                # 記録はfloat64で保持し、出力の列を作る時にfloat32へ丸める
+                pl.Series(
+                    "ONBOARD POWER STORAGE PER[%]",
+                    storage_percentage.astype(np.float32),
+                ),
+                pl.Series("ONBOARD POWER STORAGE STATUS", storage_state),
+                pl.Series("ONBOARD ENERGY STORAGE[Wh]", self._storage_arr[:n]),
+                pl.Series(
+                    "YEARLY POWER GENERATION BALANCE",
+                    self._total_gene_elect_arr[:n] - self._total_loss_elect_arr[:n],
+                ),
+            ]
+        )
+
+        return data
+
     ####################################  メソッド  ######################################
 
     # 船の機能としては発電量計算、消費電力量計算、予報データから台風の目標地点の決定、timestep後の時刻における追従対象台風の座標取得のみ？
@@ -189,13 +487,10 @@ class TPG_ship:
         #############################################################################
         """
 
-        # 台風追従に必要な出力
-        typhoon_tracking_power = (
-            self.max_speed_power + self.generating_facilities_need_max_power
-        ) * ((self.speed_kt / self.max_speed) ** 3) - self.wind_propulsion_power
-
-        if typhoon_tracking_power < 0:
-            typhoon_tracking_power = 0
+        # 台風追従に必要な出力(風力推進で賄える場合は0)
+        typhoon_tracking_power = max(
+            self._power_coefficient * self.speed_kt**3 - self.wind_propulsion_power, 0
+        )
 
         # 電気から動力への変換は損失なしで行える仮定
         energy_loss = typhoon_tracking_power * time_step
@@ -203,6 +498,22 @@ class TPG_ship:
         return energy_loss
 
     # 状態量計算
+    def _update_trig(self):
+        """
+        ############################ def _update_trig ############################
+
+        [ 説明 ]
+
+        台風発電船の現在地について、haversine公式で使う三角関数の値を計算し直す関数です。
+
+        船の座標を更新したときに呼び出し、同じ時刻内の距離計算ではこの値を使い回します。
+
+        ##############################################################################
+
+        """
+
+        self._ship_trig = position_trig(self.ship_lat, self.ship_lon)
+
     def get_distance(self, target_position):
         """
         ############################ def get_distance ############################
@@ -223,10 +534,10 @@ class TPG_ship:
         #############################################################################
         """
 
-        A_position = (self.ship_lat, self.ship_lon)
-
         # AーB間距離
-        distance = geodesic(A_position, target_position).km
+        distance = haversine_from_trig_km(
+            self._ship_trig, target_position[0], target_position[1]
+        )
 
         return distance
 
@@ -266,26 +577,11 @@ class TPG_ship:
 
         gaiseki = (x1 - x2) * (y3 - y2) - (y1 - y2) * (x3 - x2)
         naiseki = (x1 - x2) * (x3 - x2) + (y1 - y2) * (y3 - y2)
-        size12 = np.sqrt((x1 - x2) ** 2 + (y1 - y2) ** 2)
-        size32 = np.sqrt((x3 - x2) ** 2 + (y3 - y2) ** 2)
-
-        if gaiseki == 0:  # 直線上
-
-            if naiseki < 0:
-                direction = np.pi
-            else:
-                direction = 0
 
-        elif gaiseki < 0:  # 右回り
-            direction = -np.arccos((naiseki) / (size12 * size32))
+        # 外積と内積から符号付きの角度を直接求める(直線上では0または180度)
+        direction = math.atan2(gaiseki, naiseki)
 
-        elif gaiseki > 0:  # 左回り
-            direction = np.arccos((naiseki) / (size12 * size32))
-
-        else:
-            print("direction error")
-
-        direction = np.rad2deg(direction)
+        direction = math.degrees(direction)
 
         return direction
 
@@ -369,53 +665,13 @@ class TPG_ship:
         typhoon_data_forecast = self.forecast_data
 
         # 陸地認識フェーズ　陸地内に入っているデータの消去
-        typhoon_data_forecast = typhoon_data_forecast.filter(
-            (
-                ((pl.col("FORE_LAT") >= 0) & (pl.col("FORE_LAT") <= 13))
-                & (pl.col("FORE_LON") >= 127.5)
-            )  # p1 ~ p2
-            | (
-                ((pl.col("FORE_LAT") >= 13) & (pl.col("FORE_LAT") <= 15))
-                & (pl.col("FORE_LON") >= 125)
-            )  # p25 ~ p255
-            | (
-                ((pl.col("FORE_LAT") >= 15) & (pl.col("FORE_LAT") <= 24))
-                & (pl.col("FORE_LON") >= 123)
-            )  # p3 ~ p4
-            | (
-                ((pl.col("FORE_LAT") >= 24) & (pl.col("FORE_LAT") <= 26))
-                & (pl.col("FORE_LON") >= 126)
-            )  # p5 ~ p55
-            | (
-                ((pl.col("FORE_LAT") >= 26) & (pl.col("FORE_LAT") <= 28))
-                & (pl.col("FORE_LON") >= 130.1)
-            )  # p555 ~ p6
-            | (
-                ((pl.col("FORE_LAT") >= 28) & (pl.col("FORE_LAT") <= 32.2))
-                & (pl.col("FORE_LON") >= 132.4)
-            )  # p7 ~ p8
-            | (
-                ((pl.col("FORE_LAT") >= 32.2) & (pl.col("FORE_LAT") <= 34))
-                & (pl.col("FORE_LON") >= 137.2)
-            )  # p9 ~ p10
-            | (
-                ((pl.col("FORE_LAT") >= 34) & (pl.col("FORE_LAT") <= 41.2))
-                & (pl.col("FORE_LON") >= 143)
-            )  # p11 ~ p12
-            | (
-                ((pl.col("FORE_LAT") >= 41.2) & (pl.col("FORE_LAT") <= 44))
-                & (pl.col("FORE_LON") >= 149)
-            )  # p13 ~ p14
-            | (
-                ((pl.col("FORE_LAT") >= 44) & (pl.col("FORE_LAT") <= 50))
-                & (pl.col("FORE_LON") >= 156)
-            )  # p15 ~ p16
-            | ((pl.col("FORE_LAT") >= 50))  # p16 ~
+        sea_mask = _sea_mask(
+            typhoon_data_forecast["FORE_LAT"].to_numpy(),
+            typhoon_data_forecast["FORE_LON"].to_numpy(),
         )
-
-        # 台風番号順に並び替え
-        typhoon_data_forecast = typhoon_data_forecast.select(
-            pl.col("*").sort_by("TYPHOON NUMBER")
+        # 海上のデータのみを残し、台風番号順に並び替え
+        typhoon_data_forecast = typhoon_data_forecast.filter(pl.Series(sea_mask)).sort(
+            "TYPHOON NUMBER"
         )
 
         if len(typhoon_data_forecast) != 0:
@@ -425,232 +681,118 @@ class TPG_ship:
                 len(typhoon_data_forecast) - 1, "TYPHOON NUMBER"
             ]
 
-            # 台風発生時刻の取得番号
-            occurrence_time_acquisition_num = TY_start_bangou - (year - 2000) * 100
-            # 台風番号より台風の個数を調べる
-            TY_num_forecast = typhoon_data_forecast.n_unique("TYPHOON NUMBER")
+            # 予報期間内の台風がどの時刻まで予報されているのかを台風番号ごとに一度に集計する
+            TY_end_time_data = (
+                typhoon_data_forecast.group_by("TYPHOON NUMBER")
+                .agg(pl.col("unixtime").max().alias("END_TIME"))
+                .sort("TYPHOON NUMBER")
+            )
+            TY_forecast_end_time = TY_end_time_data["END_TIME"].to_numpy()
 
-            # 予報期間内の台風がどの時刻まで予報されているのかを記録するリスト
-            TY_forecast_end_time = []
             # 欠落した番号がいた場合のリスト
-            missing_num_list = []
-            # 各台風番号での予測終了時刻の取得
-            TY_bangou = TY_start_bangou
-
-            for i in range(TY_num_forecast):
-
-                # 番号が後なのに先に発生しているケースがあったのでその応急処置
-                # if (i == TY_num_forecast -1) and (error_num == 1):
-                # print("ERROR",TY_bangou,TY_end_bangou,"unixtime",current_time,"~",last_forecast_time)
-                typhoon_data_by_num = typhoon_data_forecast.filter(
-                    pl.col("TYPHOON NUMBER") == TY_bangou
-                )
-                while len(typhoon_data_by_num) == 0:
-                    if len(typhoon_data_by_num) == 0:
-                        missing_num_list.append(TY_bangou)
-                        TY_bangou = TY_bangou + 1
-                        typhoon_data_by_num = typhoon_data_forecast.filter(
-                            pl.col("TYPHOON NUMBER") == TY_bangou
-                        )
-
-                typhoon_data_by_num = typhoon_data_forecast.filter(
-                    pl.col("TYPHOON NUMBER") == TY_bangou
-                )
-                typhoon_data_by_num = typhoon_data_by_num.select(
-                    pl.col("*").sort_by("unixtime", descending=True)
-                )
-                TY_forecast_end_time.append(typhoon_data_by_num[0, "unixtime"])
-
-                TY_bangou = TY_bangou + 1
-
-            # 現在地から予測される台風の位置までの距離
-            distance_list = []
-            # 現在地から予測される台風の位置に到着する時刻
-            ship_catch_time_list = []
-            # 現在時刻から目的地に台風が到着するのにかかる時間
-            arrival_time_list = []
-            # 上記二つの時間の倍率
-            time_times_list = []
-            # 到着時から追従した場合に予測される発電量
-            projected_elect_gene_time = []
-            # 現在地から台風の位置に到着するのに実際必要な時刻
-            true_ship_catch_time_list = []
+            missing_num_list = sorted(
+                set(range(TY_start_bangou, TY_end_bangou + 1))
+                - set(TY_end_time_data["TYPHOON NUMBER"].to_list())
+            )
 
             # 台風番号順に並び替えて当該時刻に発電船が到着した場合に最後まで追従できる発電時間を項目として作る
             # last_forecast_time(予報内の最終台風存続確認時刻)と最後の時刻が等しい場合には平均の存続時間で発電量を推定する
             # 今回は良い方法が思いつかなかったので全データから台風発生時刻を取得する。本来は発生時刻を記録しておきたい。
 
             # 台風発生時刻の取得
-            # 台風発生時刻を入れておくリスト
-            TY_occurrence_time = []
-            # 各台風番号で開始時刻の取得
-            TY_occurrence_time = self.TY_start_time_list
-
-            data_num = len(typhoon_data_forecast)
-
-            # nd_time_list = []
-            # start_time_list = []
-            # shori = []
-            # データごとに予測発電時間を入力する
-            for i in range(data_num):
-                # 仮の発電開始時間
-                gene_start_time = typhoon_data_forecast[i, "unixtime"]
-                # 考える台風番号
-                TY_predict_bangou = typhoon_data_forecast[i, "TYPHOON NUMBER"]
-
-                adjustment_num = 0
-                for j in range(len(missing_num_list)):
-                    if TY_predict_bangou >= missing_num_list[j]:
-                        adjustment_num = adjustment_num + 1
-
-                # データ参照用の番号
-                data_reference_num = (
-                    TY_predict_bangou - TY_start_bangou - adjustment_num
-                )
-
-                # 当該台風の予報内での終了時刻
-                end_time_forecast_TY = TY_forecast_end_time[data_reference_num]
-                # 当該台風の発生時刻
-                start_time_forecast_TY = TY_occurrence_time[
-                    TY_predict_bangou - (year - 2000) * 100 - 1
-                ]
-                # start_time_list.append(start_time_forecast_TY)
-                # 台風最終予想時刻による場合分け。予報期間終了時刻と同じ場合はその後も台風が続くものとして、平均存続時間を用いる。
-                # 平均存続時間よりも長く続いている台風の場合は最終予想時刻までを発電するものと仮定する。
-                if (end_time_forecast_TY == last_forecast_time) and (
-                    (end_time_forecast_TY - start_time_forecast_TY)
-                    < TY_mean_time_to_live_unix
-                ):
-
-                    # 予想される発電時間[hour]を出す
-                    forecast_gene_time = (
-                        start_time_forecast_TY
-                        + TY_mean_time_to_live_unix
-                        - gene_start_time
-                    ) / 3600
-                    # end_time_list.append(start_time_forecast_TY + TY_mean_time_to_live_unix)
-                    # shori.append(1)
-
-                else:
-
-                    # 予想期間内で発電時間[hour]を出す
-                    forecast_gene_time = (end_time_forecast_TY - gene_start_time) / 3600
-                    # end_time_list.append(end_time_forecast_TY)
-                    # shori.append(2)
-
-                projected_elect_gene_time.append(forecast_gene_time)
-
-            # データフレームに予想発電時間の項目を追加する
-            # typhoon_data_forecast["処理"] = shori
-            # typhoon_data_forecast["予想発電開始時間"] = start_time_list
-            # typhoon_data_forecast["予想発電終了時間"] = end_time_list
-            typhoon_data_forecast = typhoon_data_forecast.with_columns(
-                pl.Series(projected_elect_gene_time).alias("FORE_GENE_TIME")
+            # 各台風番号で開始時刻の取得(台風番号順の配列なので番号から直接引ける)
+            TY_occurrence_time = np.asarray(self.TY_start_time_list, dtype=np.int64)
+
+            # 計算に使う列は先に配列として取り出しておく
+            fore_unixtime = typhoon_data_forecast["unixtime"].to_numpy()
+            fore_TY_bangou = typhoon_data_forecast["TYPHOON NUMBER"].to_numpy()
+            fore_lat = typhoon_data_forecast["FORE_LAT"].to_numpy()
+            fore_lon = typhoon_data_forecast["FORE_LON"].to_numpy()
+
+            # データ参照用の番号(欠落した番号の分だけ詰める)
+            # 欠落番号のリストは昇順なので、各台風番号以下の欠落数は二分探索で求まる
+            adjustment_num = np.searchsorted(
+                np.array(missing_num_list, dtype=np.int64), fore_TY_bangou, side="right"
             )
+            data_reference_num = fore_TY_bangou - TY_start_bangou - adjustment_num
 
-            # 距離の判別させる
-            for i in range(data_num):
-
-                typhoon_posi_future = (
-                    typhoon_data_forecast[i, "FORE_LAT"],
-                    typhoon_data_forecast[i, "FORE_LON"],
-                )
-                ship_typhoon_dis = self.get_distance(typhoon_posi_future)
-
-                # 座標間の距離から到着時刻を計算する
-                if ship_speed_kmh == 0:
-                    ship_speed_kmh = self.max_speed * 1.852
-                ship_catch_time = math.ceil(ship_typhoon_dis / ship_speed_kmh)
+            # 現在地から予測される台風の位置までの距離は全データまとめて計算する
+            distance_arr = _haversine_km_array(self._ship_trig, fore_lat, fore_lon)
 
-                # 現時刻から台風がその地点に到達するまでにかかる時間を出す
-                typhoon_arrival_time = int(
-                    (typhoon_data_forecast[i, "unixtime"] - current_time) / 3600
+            # 当該台風の予報内での終了時刻
+            end_time_forecast_TY = TY_forecast_end_time[data_reference_num]
+            # 当該台風の発生時刻
+            start_time_forecast_TY = TY_occurrence_time[
+                fore_TY_bangou - (year - 2000) * 100 - 1
+            ]
+            # 台風最終予想時刻による場合分け。予報期間終了時刻と同じ場合はその後も台風が続くものとして、平均存続時間を用いる。
+            # 平均存続時間よりも長く続いている台風の場合は最終予想時刻までを発電するものと仮定する。
+            use_mean_time_to_live = (end_time_forecast_TY == last_forecast_time) & (
+                (end_time_forecast_TY - start_time_forecast_TY)
+                < TY_mean_time_to_live_unix
+            )
+            # 到着時から追従した場合に予測される発電時間[hour]
+            projected_elect_gene_time = (
+                np.where(
+                    use_mean_time_to_live,
+                    start_time_forecast_TY + TY_mean_time_to_live_unix,
+                    end_time_forecast_TY,
                 )
+                - fore_unixtime
+            ) / 3600
 
-                # arrival_time_list.append(typhoon_arrival_time)
-
-                # ship_catch_time_list.append(ship_catch_time)
+            # 停止中の場合は最大船速で到着時刻を見積もる
+            if ship_speed_kmh == 0:
+                ship_speed_kmh = self.max_speed_kmh
 
-                time_times_list.append(ship_catch_time / typhoon_arrival_time)
+            # 座標間の距離から到着時刻を計算する
+            ship_catch_time = np.ceil(distance_arr / ship_speed_kmh).astype(np.int64)
 
-                # 台風の到着予定時刻と船の到着予定時刻の内遅い方をとる
-                if typhoon_arrival_time > ship_catch_time:
-                    true_ship_catch_time_list.append(typhoon_arrival_time)
-                else:
-                    true_ship_catch_time_list.append(ship_catch_time)
+            # 現時刻から台風がその地点に到達するまでにかかる時間を出す
+            typhoon_arrival_time = ((fore_unixtime - current_time) / 3600).astype(
+                np.int64
+            )
 
-                distance_list.append(ship_typhoon_dis)
+            # 現在地から台風の位置に到着するのに実際必要な時刻
+            # 台風の到着予定時刻と船の到着予定時刻の内遅い方をとる
+            true_ship_catch_time = np.maximum(typhoon_arrival_time, ship_catch_time)
 
-                # print(ship_typhoon_dis)
-                # print(typhoon_data_forecast.loc[i,"distance"])
+            # 船の到着時間と台風の到着時間の倍率
+            time_times = ship_catch_time / typhoon_arrival_time
 
-            # 台風の距離を一応書いておく
-            typhoon_data_forecast = typhoon_data_forecast.with_columns(
-                pl.Series(distance_list).alias("distance")
-            )
-            # データフレームに距離の項目を追加する
-            typhoon_data_forecast = typhoon_data_forecast.with_columns(
-                pl.Series(true_ship_catch_time_list).alias("TY_CATCH_TIME")
-            )
-            # データフレームに距離の項目を追加する
-            typhoon_data_forecast = typhoon_data_forecast.with_columns(
-                pl.Series(time_times_list).alias("JUDGE_TIME_TIMES")
+            # 予想発電時間と台風補足時間の差。名前は時間対効果
+            time_difference = projected_elect_gene_time * self.forecast_weight - (
+                true_ship_catch_time * (100 - self.forecast_weight)
             )
 
-            # 予想発電時間と台風補足時間の差を出す
-            time_difference = []
-            for i in range(len(typhoon_data_forecast)):
-                time_difference.append(
-                    typhoon_data_forecast[i, "FORE_GENE_TIME"] * self.forecast_weight
-                    - typhoon_data_forecast[i, "TY_CATCH_TIME"]
-                    * (100 - self.forecast_weight)
+            # 基準倍数以下の時間で到達できる台風のみをのこす。[実際の到達時間] ≦ (台風の到着時間) が実際の判定基準
+            candidate = time_times <= self.judge_time_times
+
+            # 時間対効果が最大のものを選ぶ。同じ値が複数ある場合は発電時間が長いもの、さらに同じ場合は台風補足時間が短いものを残す
+            # 列を並び替えて先頭と比較する代わりに、配列上で最大値・最小値と比較して一度だけ絞り込む
+            if candidate.any():
+                candidate &= time_difference == time_difference[candidate].max()
+                candidate &= (
+                    projected_elect_gene_time
+                    == projected_elect_gene_time[candidate].max()
+                )
+                candidate &= (
+                    true_ship_catch_time == true_ship_catch_time[candidate].min()
                 )
 
-            # 予想発電時間と台風補足時間の差をデータに追加。名前は時間対効果
-            typhoon_data_forecast = typhoon_data_forecast.with_columns(
-                pl.Series(time_difference).alias("TIME_EFFECT")
-            )
-
-            # 基準倍数以下の時間で到達できる台風のみをのこす。[実際の到達時間] ≦ (台風の到着時間) が実際の判定基準
+            # 残ったデータのみに予想発電時間、台風の距離、補足時間、倍率、時間対効果(予想発電時間と台風補足時間の差)を追加
             typhoon_data_forecast = typhoon_data_forecast.filter(
-                pl.col("JUDGE_TIME_TIMES") <= self.judge_time_times
-            )
-
-            # データを時間対効果が大きい順に並び替える
-            typhoon_data_forecast = typhoon_data_forecast.select(
-                pl.col("*").sort_by("TIME_EFFECT", descending=True)
+                pl.Series(candidate)
+            ).with_columns(
+                [
+                    pl.Series("FORE_GENE_TIME", projected_elect_gene_time[candidate]),
+                    pl.Series("distance", distance_arr[candidate]),
+                    pl.Series("TY_CATCH_TIME", true_ship_catch_time[candidate]),
+                    pl.Series("JUDGE_TIME_TIMES", time_times[candidate]),
+                    pl.Series("TIME_EFFECT", time_difference[candidate]),
+                ]
             )
 
-            if len(typhoon_data_forecast) != 0:
-                # 出力データフレーム
-                time_effect = typhoon_data_forecast[0, "TIME_EFFECT"]
-
-                typhoon_data_forecast = typhoon_data_forecast.filter(
-                    pl.col("TIME_EFFECT") == time_effect
-                )
-
-                if len(typhoon_data_forecast) > 1:
-                    # データを発電時間が長い順に並び替える
-                    typhoon_data_forecast = typhoon_data_forecast.select(
-                        pl.col("*").sort_by("FORE_GENE_TIME", descending=True)
-                    )
-
-                    gene_time_max = typhoon_data_forecast[0, "FORE_GENE_TIME"]
-                    typhoon_data_forecast = typhoon_data_forecast.filter(
-                        pl.col("FORE_GENE_TIME") == gene_time_max
-                    )
-
-                    if len(typhoon_data_forecast) > 1:
-                        # データを台風補足時間が短い順に並び替える
-                        typhoon_data_forecast = typhoon_data_forecast.select(
-                            pl.col("*").sort_by("TY_CATCH_TIME")
-                        )
-
-                        gene_time_max = typhoon_data_forecast[0, "TY_CATCH_TIME"]
-                        typhoon_data_forecast = typhoon_data_forecast.filter(
-                            pl.col("TY_CATCH_TIME") == gene_time_max
-                        )
-
         return typhoon_data_forecast
 
     # timestep後の時刻における追従対象台風の座標取得
@@ -677,12 +819,12 @@ class TPG_ship:
         #############################################################################
         """
 
-        forecast_data = self.forecast_data
         next_time = int(current_time + time_step * 3600)
-        target_TY = int(self.target_name)
 
-        next_time_target_data = forecast_data.filter(
-            (pl.col("unixtime") == next_time) & (pl.col("TYPHOON NUMBER") == target_TY)
+        # 追従対象の台風番号はtarget_TYに数値で保持している
+        next_time_target_data = self.forecast_data.filter(
+            (pl.col("unixtime") == next_time)
+            & (pl.col("TYPHOON NUMBER") == self.target_TY)
         )
 
         return next_time_target_data
@@ -712,13 +854,13 @@ class TPG_ship:
         #############################################################################
         """
 
-        target_position = (self.target_lat, self.target_lon)
-
-        # 目的地と現在地の距離
-        Goal_now_distance = self.get_distance(target_position)  # [km]
+        # 目的地と現在地の距離(毎時刻呼ばれるのでメソッドを介さず直接計算する)
+        Goal_now_distance = haversine_from_trig_km(
+            self._ship_trig, self.target_lat, self.target_lon
+        )  # [km]
 
-        # 船がtime_step時間で進める距離
-        advance_distance = self.change_kt_kmh() * time_step
+        # 船がtime_step時間で進める距離(kt -> km/h)
+        advance_distance = self.speed_kt * 1.852 * time_step
 
         # 緯度の差
         g_lat = self.target_lat
@@ -757,9 +899,47 @@ class TPG_ship:
             # 次の時間にいるであろう経度
             next_lon = g_lon
 
-        next_position = (next_lat, next_lon)
         self.ship_lat = next_lat
         self.ship_lon = next_lon
+        self._update_trig()
+
+    def _sail_toward(self, target_lat, target_lon, target_name, speed_kt, time_step):
+        """
+        ############################ def _sail_toward ############################
+
+        [ 説明 ]
+
+        目的地と船速を設定し、time_step以内に目的地に到着できるかを判定する関数です。
+
+        return_base_actionとreturn_standby_actionで共通の処理をまとめたものです。
+
+        ##############################################################################
+
+        引数 :
+            target_lat (float) : 目的地の緯度
+            target_lon (float) : 目的地の経度
+            target_name (int) : 目的地(TARGET_*のコード)
+            speed_kt (float) : 目的地に向かう船速(kt)
+            time_step (int) : シミュレーションにおける時間の進み幅[hours]
+
+
+        戻り値 :
+            arrived (bool) : time_step以内に目的地に到着できる場合True
+
+        #############################################################################
+        """
+
+        self.target_lat = target_lat
+        self.target_lon = target_lon
+        self.target_name = target_name
+        self.speed_kt = speed_kt
+
+        # 目的地までにかかる時間[hours]
+        dis_time = haversine_from_trig_km(self._ship_trig, target_lat, target_lon) / (
+            speed_kt * 1.852
+        )
+
+        return dis_time <= time_step
 
     def return_base_action(self, time_step):
         """
@@ -780,23 +960,20 @@ class TPG_ship:
         #############################################################################
         """
 
-        self.target_lat = self.base_lat
-        self.target_lon = self.base_lon
-
         self.go_base = 1
-        self.brance_condition = "battery capacity exceeded specified ratio"
-
-        # 帰港での船速の入力
-        self.speed_kt = self.nomal_ave_speed
-
-        self.target_name = "base station"
-
-        base_ship_dis_time = (
-            self.get_distance((self.base_lat, self.base_lon)) / self.change_kt_kmh()
+        self.brance_condition = COND_BATTERY_EXCEEDED
+
+        # 目的地と帰港での船速の入力
+        arrived = self._sail_toward(
+            self.base_lat,
+            self.base_lon,
+            TARGET_BASE_STATION,
+            self.nomal_ave_speed,
+            time_step,
         )
         # timestep後に拠点に船がついている場合
-        if base_ship_dis_time <= time_step:
-            self.brance_condition = "arrival at base station"
+        if arrived:
+            self.brance_condition = COND_ARRIVAL_BASE
             self.go_base = 0
             self.TY_and_base_action = 0
 
@@ -842,21 +1019,18 @@ class TPG_ship:
         #############################################################################
         """
 
-        self.brance_condition = "returning to standby position as no typhoon"
-
-        self.target_lat = self.standby_lat
-        self.target_lon = self.standby_lon
+        self.brance_condition = COND_RETURN_STANDBY
 
-        self.target_name = "Standby position"
-
-        self.speed_kt = self.nomal_ave_speed
-        standby_ship_dis_time = (
-            self.get_distance((self.standby_lat, self.standby_lon))
-            / self.change_kt_kmh()
+        arrived = self._sail_toward(
+            self.standby_lat,
+            self.standby_lon,
+            TARGET_STANDBY,
+            self.nomal_ave_speed,
+            time_step,
         )
 
-        if standby_ship_dis_time <= time_step:
-            self.brance_condition = "arrival at standby position"
+        if arrived:
+            self.brance_condition = COND_ARRIVAL_STANDBY
 
             self.speed_kt = 0
 
@@ -898,33 +1072,34 @@ class TPG_ship:
         #############################################################################
         """
 
-        self.speed_kt = self.max_speed
+        # 追従対象の台風のデータは1行目のみを使うので、先に辞書として取り出しておく
+        target_TY_row = self.target_TY_data.row(0, named=True)
+        TY_catch_time = target_TY_row["TY_CATCH_TIME"]
 
-        max_speed_kmh = self.change_kt_kmh()
+        self.speed_kt = self.max_speed
 
         # GS_dis_judge = TY_tracking_speed_kmh*self.distance_judge_hours
 
-        TY_tracking_speed = (self.target_TY_data[0, "distance"]) / (
-            self.target_TY_data[0, "TY_CATCH_TIME"]
-        )  # その場から台風へ時間ぴったりに着くように移動する場合の船速
+        # その場から台風へ時間ぴったりに着くように移動する場合の船速
+        TY_tracking_speed = target_TY_row["distance"] / TY_catch_time
 
         # 算出したTY_tracking_speedが最大船速を超えないか判断。超える場合は最大船速に置き換え
-        if TY_tracking_speed > max_speed_kmh:
+        if TY_tracking_speed > self.max_speed_kmh:
             self.speed_kt = self.max_speed
         else:
             # km/hをktに変換
             self.speed_kt = TY_tracking_speed / 1.852
 
         # 追従対象の台風までの距離
-        GS_TY_dis = self.target_TY_data[0, "distance"]
+        GS_TY_dis = target_TY_row["distance"]
 
-        self.brance_condition = "tracking typhoon at maximum ship speed started"
+        self.brance_condition = COND_CHASE_MAX_SPEED
 
-        self.target_lat = self.target_TY_data[0, "FORE_LAT"]
-        self.target_lon = self.target_TY_data[0, "FORE_LON"]
+        self.target_lat = target_TY_row["FORE_LAT"]
+        self.target_lon = target_TY_row["FORE_LON"]
 
-        if self.target_TY_data[0, "TY_CATCH_TIME"] <= time_step:
-            self.brance_condition = "arrived at typhoon"
+        if TY_catch_time <= time_step:
+            self.brance_condition = COND_ARRIVAL_TYPHOON
             self.speed_kt = self.max_speed
 
             self.GS_gene_judge = 1
@@ -936,7 +1111,7 @@ class TPG_ship:
 
         else:
 
-            self.brance_condition = "tracking typhoon"
+            self.brance_condition = COND_CHASE_TYPHOON
 
             self.GS_gene_judge = 0
 
@@ -949,26 +1124,20 @@ class TPG_ship:
             self.distance_check = 1  # 1ならチェック必要
 
         # 拠点を経由できるか、するかの判断フェーズ
-        direction_to_TY = self.get_direction((self.target_lat, self.target_lon))
-        direction_to_base = self.get_direction((self.base_lat, self.base_lon))
-        direction_difference = np.abs(direction_to_TY - direction_to_base)
-        targetTY_base_dis = geodesic(
-            (self.target_lat, self.target_lon), (self.base_lat, self.base_lon)
-        ).km
-        need_distance = (
-            self.get_distance((self.base_lat, self.base_lon)) + targetTY_base_dis
-        )
-        max_speed_kmh = self.max_speed * 1.852
-        need_time_hours = need_distance / max_speed_kmh
-        TY_catch_time = self.target_TY_data[0, "TY_CATCH_TIME"]
-
-        TY_distance = self.get_distance((self.target_lat, self.target_lon))
-        base_distance = self.get_distance((self.base_lat, self.base_lon))
-        distance_dis = TY_distance - base_distance
-
         self.TY_and_base_action = 0
 
+        # 蓄電量が基準値未満なら拠点を経由しないので、距離や方位の計算も行わない
         if self.storage_percentage >= self.govia_base_judge_energy_storage_per:
+            targetTY_base_dis = haversine_km(
+                self.target_lat, self.target_lon, self.base_lat, self.base_lon
+            )
+            # 台風までの距離はget_target_dataで同じ位置から計算済みのものを使い、拠点までの距離は一度だけ計算する
+            TY_distance = GS_TY_dis
+            base_distance = self.get_distance((self.base_lat, self.base_lon))
+
+            need_distance = base_distance + targetTY_base_dis
+            need_time_hours = need_distance / self.max_speed_kmh
+
             if need_time_hours <= TY_catch_time:
                 # 元の目的地に問題なくつけるのであれば即実行
                 self.speed_kt = self.max_speed
@@ -978,9 +1147,20 @@ class TPG_ship:
 
                 self.return_base_action
 
-                self.brance_condition = "tracking typhoon via base"
+                self.brance_condition = COND_CHASE_VIA_BASE
 
             else:
+                # 方位の差はこちらの判断でのみ使う
+                direction_to_TY = self.get_direction((self.target_lat, self.target_lon))
+                direction_to_base = self.get_direction((self.base_lat, self.base_lon))
+                direction_difference = abs(direction_to_TY - direction_to_base)
+                # 方位は-180~180度なので、180度を跨ぐ場合は反対回りの角度差をとる
+                direction_difference = min(
+                    direction_difference, 360 - direction_difference
+                )
+
+                distance_dis = TY_distance - base_distance
+
                 if direction_difference < self.judge_direction and distance_dis > 0:
                     # 拠点の方が近くて、方位に大きな差がなければとりあえず経由する
                     self.speed_kt = self.max_speed
@@ -990,7 +1170,7 @@ class TPG_ship:
 
                     self.return_base_action
 
-                    self.brance_condition = "tracking typhoon via base"
+                    self.brance_condition = COND_CHASE_VIA_BASE
 
     # 状態量計算
     # 行動判定も入っているので機能の要素も入っている？
@@ -1032,6 +1212,9 @@ class TPG_ship:
 
         self.distance_check = 0
 
+        # 次の時刻での追従対象台風のデータ。追従対象が決まった分岐で一度だけ取得し、最後の発電判定でも使い回す
+        next_time_TY_data = self.forecast_data.head(0)
+
         # 蓄電量X％以上の場合
         if (
             self.storage_percentage >= self.judge_energy_storage_per
@@ -1043,7 +1226,7 @@ class TPG_ship:
             self.return_base_action(time_step)
 
             if self.standby_via_base == 1:
-                self.brance_condition = "return standby via base"
+                self.brance_condition = COND_STANDBY_VIA_BASE
 
             ############  ここでデータ取得から判断させるよりも台風発電の選択肢に行った時にフラグを立てる方が良いかも？  ###############
 
@@ -1066,7 +1249,7 @@ class TPG_ship:
 
                 self.next_TY_lat = 0
                 self.next_TY_lon = 0
-                self.next_ship_TY_dis = " "
+                self.next_ship_TY_dis = np.nan
 
             elif (
                 self.storage_percentage >= self.govia_base_judge_energy_storage_per
@@ -1080,29 +1263,33 @@ class TPG_ship:
 
                     self.next_TY_lat = 0
                     self.next_TY_lon = 0
-                    self.next_ship_TY_dis = " "
+                    self.next_ship_TY_dis = np.nan
 
                 elif self.TY_and_base_action == 1:
 
                     # 台風が来ているけど途中でよる場合の処理
-                    self.brance_condition = "tracking typhoon via base"
+                    self.brance_condition = COND_CHASE_VIA_BASE
 
                     # 最大船速でとっとと戻る
                     self.speed_kt = self.max_speed
 
-                    self.target_name = str(self.target_TY_data[0, "TYPHOON NUMBER"])
-                    self.target_TY = self.target_TY_data[0, "TYPHOON NUMBER"]
+                    target_TY_row = self.target_TY_data.row(0, named=True)
+
+                    self.target_name = TARGET_TYPHOON
+                    self.target_TY = target_TY_row["TYPHOON NUMBER"]
+                    self._target_name_TY = self.target_TY
 
-                    comparison_lat = self.target_TY_data[0, "FORE_LAT"]
-                    comparison_lon = self.target_TY_data[0, "FORE_LON"]
+                    comparison_lat = target_TY_row["FORE_LAT"]
+                    comparison_lon = target_TY_row["FORE_LON"]
 
                     next_time_TY_data = self.get_next_time_target_TY_data(
                         time_step, current_time
                     )
 
                     if len(next_time_TY_data) != 0:
-                        self.next_TY_lat = next_time_TY_data[0, "FORE_LAT"]
-                        self.next_TY_lon = next_time_TY_data[0, "FORE_LON"]
+                        next_TY_row = next_time_TY_data.row(0, named=True)
+                        self.next_TY_lat = next_TY_row["FORE_LAT"]
+                        self.next_TY_lon = next_TY_row["FORE_LON"]
                         next_TY_locate = (self.next_TY_lat, self.next_TY_lon)
 
                         self.next_ship_TY_dis = self.get_distance(next_TY_locate)
@@ -1111,7 +1298,7 @@ class TPG_ship:
                         # 追従対象の台風がないことにする
                         self.next_TY_lat = 0
                         self.next_TY_lon = 0
-                        self.next_ship_TY_dis = " "
+                        self.next_ship_TY_dis = np.nan
 
                     if (
                         target_TY_lat != comparison_lat
@@ -1127,7 +1314,7 @@ class TPG_ship:
 
             self.next_TY_lat = 0
             self.next_TY_lon = 0
-            self.next_ship_TY_dis = " "
+            self.next_ship_TY_dis = np.nan
 
             self.speed_kt = self.max_speed
             # 追従対象の台風が存在するか判別
@@ -1139,7 +1326,7 @@ class TPG_ship:
 
                 if self.storage_percentage >= self.govia_base_judge_energy_storage_per:
                     self.return_base_action(time_step)
-                    self.brance_condition = "return standby via base"
+                    self.brance_condition = COND_STANDBY_VIA_BASE
                     self.standby_via_base = 1
                     self.target_TY = 0
                 else:
@@ -1149,24 +1336,28 @@ class TPG_ship:
             # 追従対象の台風が存在する場合
             elif typhoon_num >= 1:
 
-                self.target_name = str(self.target_TY_data[0, "TYPHOON NUMBER"])
-                self.target_TY = self.target_TY_data[0, "TYPHOON NUMBER"]
+                target_TY_row = self.target_TY_data.row(0, named=True)
+
+                self.target_name = TARGET_TYPHOON
+                self.target_TY = target_TY_row["TYPHOON NUMBER"]
+                self._target_name_TY = self.target_TY
 
                 next_time_TY_data = self.get_next_time_target_TY_data(
                     time_step, current_time
                 )
 
                 if len(next_time_TY_data) != 0:
-                    self.next_TY_lat = next_time_TY_data[0, "FORE_LAT"]
-                    self.next_TY_lon = next_time_TY_data[0, "FORE_LON"]
+                    next_TY_row = next_time_TY_data.row(0, named=True)
+                    self.next_TY_lat = next_TY_row["FORE_LAT"]
+                    self.next_TY_lon = next_TY_row["FORE_LON"]
                     next_TY_locate = (self.next_TY_lat, self.next_TY_lon)
 
                     self.next_ship_TY_dis = self.get_distance(next_TY_locate)
 
                 self.typhoon_chase_action(time_step)
 
-                target_TY_lat = self.target_TY_data[0, "FORE_LAT"]
-                target_TY_lon = self.target_TY_data[0, "FORE_LAT"]
+                target_TY_lat = target_TY_row["FORE_LAT"]
+                target_TY_lon = target_TY_row["FORE_LAT"]
 
                 ####
 
@@ -1201,8 +1392,9 @@ class TPG_ship:
             if len(next_time_TY_data) != 0:
                 next_ship_locate = (self.ship_lat, self.ship_lon)
 
-                self.next_TY_lat = next_time_TY_data[0, "FORE_LAT"]
-                self.next_TY_lon = next_time_TY_data[0, "FORE_LON"]
+                next_TY_row = next_time_TY_data.row(0, named=True)
+                self.next_TY_lat = next_TY_row["FORE_LAT"]
+                self.next_TY_lon = next_TY_row["FORE_LON"]
 
                 next_TY_locate = (self.next_TY_lat, self.next_TY_lon)
 
@@ -1212,7 +1404,7 @@ class TPG_ship:
                 len(next_time_TY_data) != 0
                 and self.next_ship_TY_dis <= self.effective_range
             ):
-                self.brance_condition = "within 50km of a typhoon following"
+                self.brance_condition = COND_WITHIN_50KM
 
                 self.GS_gene_judge = 1
                 self.GS_loss_judge = 0
@@ -1233,24 +1425,30 @@ class TPG_ship:
 
         # 現在この関数での出力は次の時刻での　船の状態　追従目標　船速　座標　単位時間消費電力・発電量　保有電力　保有電力割合　目標地点との距離　となっている
 
+        # 電力計算で何度も参照する状態量はローカル変数に取り出しておく
+        GS_gene_judge = self.GS_gene_judge
+        GS_loss_judge = self.GS_loss_judge
+
         # その時刻〜次の時刻での消費電力計算
-        self.loss_elect = (
-            self.calculate_power_consumption(time_step) * self.GS_loss_judge
-        )
+        loss_elect = self.calculate_power_consumption(time_step) * GS_loss_judge
 
         # その時刻〜次の時刻での発電量計算
-        self.gene_elect = self.generator_output * time_step * self.GS_gene_judge
+        gene_elect = self.generator_output * time_step * GS_gene_judge
+
+        self.loss_elect = loss_elect
+        self.gene_elect = gene_elect
 
-        self.total_gene_elect = self.total_gene_elect + self.gene_elect
-        self.total_loss_elect = self.total_loss_elect + self.loss_elect
+        self.total_gene_elect = self.total_gene_elect + gene_elect
+        self.total_loss_elect = self.total_loss_elect + loss_elect
 
-        self.total_gene_time = self.total_gene_time + time_step * self.GS_gene_judge
-        self.total_loss_time = self.total_loss_time + time_step * self.GS_loss_judge
+        self.total_gene_time = self.total_gene_time + time_step * GS_gene_judge
+        self.total_loss_time = self.total_loss_time + time_step * GS_loss_judge
 
         # 次の時刻での発電船保有電力
-        self.storage = self.storage + self.gene_elect - self.loss_elect
+        storage = self.storage + gene_elect - loss_elect
 
-        self.storage_percentage = self.storage / self.max_storage * 100
+        self.storage = storage
+        self.storage_percentage = storage / self.max_storage * 100
 
         # 目標地点との距離
         target_position = (self.target_lat, self.target_lon)
@@ -1,3 +1,4 @@
+import math
 import os
 from datetime import datetime, timedelta, timezone
 
@@ -6,12 +7,13 @@ import cartopy.feature as cfeature
 import cv2
 import matplotlib.patches as patches
 import matplotlib.pyplot as plt
-import numpy as np
 import polars as pl
 import scienceplots
 from PIL import Image
 from tqdm import tqdm
 
+from tpg_ship_sim.model import forecaster
+
 
 def get_concat_h_resize(
     im1: Image.Image,
@@ -126,7 +128,7 @@ def draw_map(
 ):
 
     # データの読み込み
-    typhoon_data = pl.read_csv(typhoon_data_path)
+    typhoon_data = forecaster.load_typhoon_data(typhoon_data_path)
     ship_typhoon_route_data = pl.read_csv(tpg_ship_result_path)
     stBASE_data = pl.read_csv(strorage_base_result_path)
     spSHIP1_data = pl.read_csv(support_ship_1_result_path)
@@ -476,7 +478,7 @@ def draw_map(
 
         size = 10
 
-        vec_size = np.sqrt(u**2 + v**2)
+        vec_size = math.hypot(u, v)
         ax.quiver(
             spship1_lon,
             spship1_lat,
@@ -509,7 +511,7 @@ def draw_map(
 
         size = 10
 
-        vec_size = np.sqrt(u**2 + v**2)
+        vec_size = math.hypot(u, v)
         ax.quiver(
             spship2_lon,
             spship2_lat,
@@ -542,7 +544,7 @@ def draw_map(
 
         size = 10
 
-        vec_size = np.sqrt(u**2 + v**2)
+        vec_size = math.hypot(u, v)
         ax.quiver(
             ship_lon,
             ship_lat,
@@ -580,7 +582,6 @@ def draw_graph(
 ):
 
     # データの読み込み
-    typhoon_data = pl.read_csv(typhoon_data_path)
     TPGship_data = pl.read_csv(tpg_ship_result_path)
     stBASE_data = pl.read_csv(strorage_base_result_path)
 
@@ -589,26 +590,15 @@ def draw_graph(
 
     UTC = timezone(timedelta(hours=+0), "UTC")
 
-    # データの整理
-    totalgene = TPGship_data["YEARLY POWER GENERATION BALANCE"]
-    tg = []
-    for i in range(len(totalgene)):
-        tg.append(totalgene[i] / 10**9)
-
-    onboardene = TPGship_data["ONBOARD ENERGY STORAGE[Wh]"]
-    obe = []
-    for i in range(len(onboardene)):
-        obe.append(onboardene[i] / 10**9)
-
-    basestorage = stBASE_data["STORAGE[Wh]"]
-    base_data = []
-    for i in range(len(basestorage)):
-        base_data.append(basestorage[i] / 10**9)
-
-    day = TPGship_data["unixtime"]
-    daylist = []
-    for i in range(len(day)):
-        daylist.append((day[i] - day[0]) / 86400)
+    # データの整理(列ごとに配列として一度に単位変換する)
+    tg = TPGship_data["YEARLY POWER GENERATION BALANCE"].to_numpy() / 10**9
+
+    obe = TPGship_data["ONBOARD ENERGY STORAGE[Wh]"].to_numpy() / 10**9
+
+    base_data = stBASE_data["STORAGE[Wh]"].to_numpy() / 10**9
+
+    day = TPGship_data["unixtime"].to_numpy()
+    daylist = (day - day[0]) / 86400
 
     # グラフの表示
     plt.style.use(["science", "no-latex", "high-vis", "grid"])  # latexなしで動くように